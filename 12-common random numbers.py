@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+#
+# Simpy Example - Comparing scenarios with common random numbers
+# for 2110636 Performance Evaluation and Analysis Class
+# Natawut Nupairoj, Chulalongkorn University, Thailand
+import simpy
+from resource_monitor import Monitor, MonitoredResource
+from replication import compare_scenarios, summarize_monitor
+from variates import StreamSet
+
+
+# Generic helper class to hold information regarding to resource
+# This simplifies how we pass information from main program to entity process
+class Server(object):
+    def __init__(self, env, name, capacity, service_rate):
+        self.name = name
+        self.env = env
+        self.service_rate = service_rate
+        self.capacity = capacity
+        self.resource = MonitoredResource(env, capacity=capacity)
+
+
+def find_shortest_queues(servers, rng):
+    # ties are broken at random with the routing stream
+    min_n = -1
+    candidates = []
+    for s in servers:
+        n_in_server = s.resource.count + len(s.resource.queue)
+        if n_in_server < min_n or min_n == -1:
+            min_n = n_in_server
+            candidates = [s]
+        elif n_in_server == min_n:
+            candidates.append(s)
+    return candidates[int(rng.random() * len(candidates))]
+
+
+# passenger - Entity Process
+# The service time is drawn on arrival from the service stream, so the n-th
+# passenger needs the same service in both scenarios
+def passenger(env, name, servers, streams, monitor):
+    t_arrive = env.now
+    service_time = streams['service'].expovariate(service_rate)
+    server = find_shortest_queues(servers, streams['routing'])
+    with server.resource.request() as request:
+        yield request
+        t_queue = env.now - t_arrive
+        yield env.timeout(service_time)
+        t_response = env.now - t_arrive
+    monitor.entity_logger(server.name, name, { 't_queue': t_queue, 't_response': t_response })
+
+
+# generator - Supporting Process
+# Create new passenger and then sleep for random amount of time
+def passenger_generator(env, servers, arrival_rate, streams, monitor):
+    i = 0
+    while True:
+        ename = 'Passenger#{}'.format(i)
+        env.process(passenger(env, ename, servers, streams, monitor))
+        next_entity_arrival = streams['arrival'].expovariate(arrival_rate)
+        yield env.timeout(next_entity_arrival)
+        i += 1
+
+
+def run_scenario(servers, env, seed, antithetic):
+    streams = StreamSet(seed, antithetic)
+    monitor = Monitor()
+    for s in servers:
+        monitor.register(s.name, s.resource, s.capacity)
+    env.process(passenger_generator(env, servers, arrival_rate, streams, monitor))
+    env.run(until=SIMULATION_END_TIME)
+    return monitor
+
+
+def summarize_office(monitor):
+    # the whole office, whatever the number of servers: utilization of all
+    # counters, total queue length and entity means over all passengers
+    servers = summarize_monitor(monitor)
+    capacity = dict((name, monitor.get_resource(name)['capacity']) for name in servers)
+    count = sum(s['entity']['count'] for s in servers.values())
+    office = {
+        'util': sum(s['util'] * capacity[name] for name, s in servers.items()) / sum(capacity.values()),
+        'queue': sum(s['queue'] for s in servers.values()),
+        'entity': { 'count': count }
+    }
+    for key in ('t_queue', 't_response'):
+        office['entity'][key] = sum(s['entity'][key] * s['entity']['count']
+                                    for s in servers.values() if s['entity']['count']) / count
+    return { 'office': office }
+
+
+# scenario A - one queue served by 2 counters
+def single_queue(seed, antithetic=False):
+    env = simpy.Environment()
+    servers = [Server(env, 'office', capacity=2, service_rate=service_rate)]
+    return run_scenario(servers, env, seed, antithetic)
+
+
+# scenario B - 2 counters with separated queues
+def separated_queues(seed, antithetic=False):
+    env = simpy.Environment()
+    servers = [Server(env, 'office-1', capacity=1, service_rate=service_rate),
+               Server(env, 'office-2', capacity=1, service_rate=service_rate)]
+    return run_scenario(servers, env, seed, antithetic)
+
+
+# for simplicity, we define arrival and service rate as mean inter-arrival time and mean service time
+MEAN_INTER_ARRIVAL_TIME = 5     # 5 time units between arrivals
+MEAN_SERVICE_TIME = 8           # 8 time units for each service
+SIMULATION_END_TIME = 5000
+
+arrival_rate = 1/MEAN_INTER_ARRIVAL_TIME
+service_rate = 1/MEAN_SERVICE_TIME
+
+if __name__ == "__main__":
+    # every server is monitored and summarize_office adds them up, so both
+    # scenarios are compared on the whole office
+    seeds = range(1, 21)
+    metrics = ['office.entity.t_response', 'office.queue', 'office.util']
+    r = compare_scenarios(single_queue, separated_queues, seeds, metrics, summarize=summarize_office)
+    print('common random numbers', r['stats'])
+    r = compare_scenarios(single_queue, separated_queues, seeds, metrics, antithetic=True, summarize=summarize_office)
+    print('common random numbers + antithetic', r['stats'])
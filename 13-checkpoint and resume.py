@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+#
+# Simpy Example - Checkpoint a run, then resume and extend it
+# for 2110636 Performance Evaluation and Analysis Class
+# Natawut Nupairoj, Chulalongkorn University, Thailand
+import os
+import shutil
+import tempfile
+import simpy
+import random
+from resource_monitor import Monitor, MonitoredResource
+from checkpoint import EntityRegistry, save_checkpoint, load_checkpoint
+
+
+# Generic helper class to hold information regarding to resource
+# This simplifies how we pass information from main program to entity process
+class Server(object):
+    def __init__(self, env, name, capacity, service_rate):
+        self.name = name
+        self.env = env
+        self.service_rate = service_rate
+        self.capacity = capacity
+        self.resource = MonitoredResource(env, capacity=capacity)
+
+    def get_service_time(self):
+        return random.expovariate(self.service_rate)
+
+
+# passenger - Entity Process
+# The passenger keeps its state in the registry so that it can be restarted
+# from a checkpoint: waiting passengers queue again, the one being served
+# only waits for the rest of its service
+def passenger(env, pid, server, monitor, registry, t_arrive=None, t_done=None):
+    if t_arrive is None:
+        t_arrive = env.now
+        registry.update(pid, t_arrive=t_arrive, t_done=None)
+    with server.resource.request() as request:
+        yield request
+        if t_done is None:
+            t_queue = env.now - t_arrive
+            t_done = env.now + server.get_service_time()
+            registry.update(pid, t_done=t_done, t_queue=t_queue)
+        yield env.timeout(t_done - env.now)
+    stats = { 't_queue': registry.entities[pid]['t_queue'], 't_response': env.now - t_arrive }
+    registry.remove(pid)
+    monitor.entity_logger(server.name, pid, stats)
+
+
+# generator - Supporting Process
+# Create new passenger and then sleep for random amount of time
+def passenger_generator(env, server, arrival_rate, monitor, registry):
+    i = registry.values.get('next_id', 0)
+    if 'next_arrival' in registry.values:
+        yield env.timeout(registry.values['next_arrival'] - env.now)
+    while True:
+        env.process(passenger(env, i, server, monitor, registry))
+        next_entity_arrival = random.expovariate(arrival_rate)
+        i += 1
+        registry.values['next_id'] = i
+        registry.values['next_arrival'] = env.now + next_entity_arrival
+        yield env.timeout(next_entity_arrival)
+
+
+def build(env, monitor, registry):
+    ticket_office = Server(env, 'office', capacity=1, service_rate=service_rate)
+    if 'office' in monitor.get_names():
+        monitor.rebind('office', ticket_office.resource)
+    else:
+        monitor.register('office', ticket_office.resource, ticket_office.capacity)
+    # passengers in service come back first, then the queue in arrival order
+    for e in registry.get_entities(key=lambda e: (e['t_done'] is None, e['t_arrive'])):
+        env.process(passenger(env, e['id'], ticket_office, monitor, registry, e['t_arrive'], e['t_done']))
+    env.process(passenger_generator(env, ticket_office, arrival_rate, monitor, registry))
+
+
+# for simplicity, we define arrival and service rate as mean inter-arrival time and mean service time
+MEAN_INTER_ARRIVAL_TIME = 10     # 10 time units between arrivals
+MEAN_SERVICE_TIME = 8            # 8 time units for each service
+SIMULATION_END_TIME = 50000
+
+arrival_rate = 1/MEAN_INTER_ARRIVAL_TIME
+service_rate = 1/MEAN_SERVICE_TIME
+
+# run to SIMULATION_END_TIME and keep a checkpoint
+random.seed(1234)
+env = simpy.Environment()
+monitor = Monitor()
+registry = EntityRegistry()
+build(env, monitor, registry)
+env.run(until=SIMULATION_END_TIME)
+print('first run  ', monitor.get_summary('office'), monitor.get_entity_stats('office').mean('t_response'))
+checkpoint_dir = tempfile.mkdtemp()
+checkpoint_path = os.path.join(checkpoint_dir, '13-checkpoint.pickle')
+save_checkpoint(checkpoint_path, env, monitor, registry=registry)
+
+# extending in the same process only costs the extra time
+env.run(until=2*SIMULATION_END_TIME)
+print('extended   ', monitor.get_summary('office'), monitor.get_entity_stats('office').mean('t_response'))
+
+# the same extension from the checkpoint, as another process would do it
+state = load_checkpoint(checkpoint_path)
+shutil.rmtree(checkpoint_dir)
+env = simpy.Environment(initial_time=state['clock'])
+monitor = state['monitor']
+build(env, monitor, state['registry'])
+env.run(until=2*SIMULATION_END_TIME)
+print('restored   ', monitor.get_summary('office'), monitor.get_entity_stats('office').mean('t_response'))
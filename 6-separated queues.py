@@ -5,6 +5,7 @@
 # Natawut Nupairoj, Chulalongkorn University, Thailand
 import simpy
 import random
+from dispatcher import Dispatcher
 
 
 # Generic helper class to hold information regarding to resource
@@ -24,24 +25,13 @@ class Server(object):
         return random.expovariate(self.service_rate)
 
 
-def find_shortest_queues(servers):
-    min_n = -1
-    min_s = None
-    for s in servers:
-        n_in_server = s.resource.count + len(s.resource.queue)
-        if n_in_server < min_n or min_n == -1:
-            min_n = n_in_server
-            min_s = s
-    return min_s, min_n
-
-
 # passenger - Entity Process
 # Describe how passenger performs at the ticket office
-def passenger(env, name, servers):
+def passenger(env, name, dispatcher):
     print('[{:6.2f}:{}] - arrive at the station'.format(env.now, name))
     # passenger will choose a server with the shorest queue
-    server, num_in_server = find_shortest_queues(servers)
-    for s in servers:
+    server, num_in_server = dispatcher.dispatch()
+    for s in dispatcher.servers:
         s.print_stats()
     print('[{:6.2f}:{}] - chooses {} with {} pax in the office'.format(env.now, name, server.name, num_in_server))
     with server.resource.request() as request:
@@ -56,11 +46,11 @@ def passenger(env, name, servers):
 
 # generator - Supporting Process
 # Create new passenger and then sleep for random amount of time
-def passenger_generator(env, servers, arrival_rate):
+def passenger_generator(env, dispatcher, arrival_rate):
     i = 0
     while True:
         ename = 'Passenger#{}'.format(i)
-        env.process(passenger(env, ename, servers))
+        env.process(passenger(env, ename, dispatcher))
         next_entity_arrival = random.expovariate(arrival_rate)
         yield env.timeout(next_entity_arrival)
         i += 1
@@ -78,7 +68,9 @@ env = simpy.Environment()
 ticket_office1 = Server(env, 'office-1', capacity=1, service_rate=service_rate)
 ticket_office2 = Server(env, 'office-2', capacity=1, service_rate=service_rate)
 ticket_offices = [ticket_office1, ticket_office2]
-env.process(passenger_generator(env, ticket_offices, arrival_rate))
+# the dispatcher keeps the offices ordered by the number of passengers in them
+dispatcher = Dispatcher(env, ticket_offices, policy='jsq')
+env.process(passenger_generator(env, dispatcher, arrival_rate))
 env.run(until=SIMULATION_END_TIME)
 
 
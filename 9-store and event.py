@@ -5,6 +5,7 @@
 # Natawut Nupairoj, Chulalongkorn University, Thailand
 import simpy
 import random
+from batch_store import BatchStore
 
 
 # Helper class to
@@ -93,10 +94,9 @@ def passenger_generator(env, ticket_machine, ticket_office, gate, arrival_rate):
 def train(env, on_board, remaining, platform):
     n_pax_wait = len(platform.items)
     print('[{:6.2f}:Train] - train has arrived with {} pax on board, {} seats remaining, and {} pax waiting on the platform'.format(env.now, on_board, remaining, n_pax_wait))
-    if n_pax_wait < remaining:
-        remaining = n_pax_wait
-    for i in range(remaining):
-        passenger_ev = yield platform.get()
+    # take up to the remaining seats of the waiting passengers in one get
+    passengers = yield platform.get_batch(remaining, min_items=0)
+    for passenger_ev in passengers:
         # inform the passenger to board the train
         passenger_ev.succeed()
         on_board += 1
@@ -133,7 +133,7 @@ env = simpy.Environment()
 ticket_office = Server(env, 'ticket_office', 1, to_service_rate)
 ticket_machine = Server(env, 'ticket_machine', 2, tm_service_rate)
 gate = Server(env, 'gate', 1, ga_service_rate)
-platform = simpy.Store(env, capacity=1000)
+platform = BatchStore(env, capacity=1000)
 env.process(passenger_generator(env, ticket_machine, ticket_office, gate, arrival_rate))
 env.process(train_generator(env, TRAIN_INTERVAL, TRAIN_CAPACITY, platform))
 env.run(until=SIMULATION_END_TIME)
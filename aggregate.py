@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+#
+# Simpy Example - Aggregation of series across replications
+# for 2110636 Performance Evaluation and Analysis Class
+# Natawut Nupairoj, Chulalongkorn University, Thailand
+import numpy as np
+import scipy.stats as st
+
+
+def stack(series, length=None):
+    """Stack per-run series indexed by entity into a (runs x index) array,
+    truncated to the shortest run (or to *length*).
+    """
+    if length is None:
+        length = min(len(s) for s in series)
+    return np.vstack([np.asarray(s[:length], dtype=float) for s in series])
+
+
+def stack_on_clock(clocks, values, grid):
+    """Align per-run series on the simulation clock: each run's value at a
+    grid point is its last value at or before that point (NaN before its
+    first clock).  Returns a (runs x grid) array.
+    """
+    grid = np.asarray(grid, dtype=float)
+    rows = []
+    for c, v in zip(clocks, values):
+        v = np.asarray(v, dtype=float)
+        index = np.searchsorted(np.asarray(c, dtype=float), grid, side='right') - 1
+        row = v[np.maximum(index, 0)]
+        row[index < 0] = np.nan
+        rows.append(row)
+    return np.vstack(rows)
+
+
+def aggregate(matrix, alpha=0.95, percentiles=(5, 95)):
+    """Mean, standard deviation, t-based confidence interval and percentile
+    envelopes across runs (rows), for every point (column) at once.
+    """
+    matrix = np.asarray(matrix, dtype=float)
+    n = matrix.shape[0]
+    mean = matrix.mean(axis=0)
+    std = matrix.std(axis=0, ddof=1) if n > 1 else np.zeros_like(mean)
+    half_width = st.t.ppf((1 + alpha) / 2, n - 1) * std / np.sqrt(n) if n > 1 else np.zeros_like(mean)
+    r = { 'runs': n, 'mean': mean, 'std': std, 'low': mean - half_width, 'high': mean + half_width }
+    for p, envelope in zip(percentiles, np.percentile(matrix, percentiles, axis=0)):
+        r['p{:g}'.format(p)] = envelope
+    return r
+
+
+if __name__ == "__main__":
+    import time
+
+    rng = np.random.default_rng(1234)
+    # 100 runs of 50,000 entities with slightly different lengths
+    runs = [np.cumsum(rng.exponential(6.667, 50000 - i)) / np.arange(1, 50001 - i) for i in range(100)]
+    t = time.perf_counter()
+    r = aggregate(stack(runs))
+    print('{:.1f} ms'.format(1000 * (time.perf_counter() - t)), r['runs'], r['mean'][-1], r['low'][-1], r['high'][-1])
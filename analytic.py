@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+#
+# Simpy Example - Closed-form results for M/M/c queues and Jackson networks
+# for 2110636 Performance Evaluation and Analysis Class
+# Natawut Nupairoj, Chulalongkorn University, Thailand
+from collections import namedtuple
+import numpy as np
+
+# anything with name, capacity and service_rate can be used, e.g. Server
+Station = namedtuple('Station', ['name', 'capacity', 'service_rate'])
+
+
+def erlang_c(a, c):
+    """Probability that an arrival has to wait in an M/M/c queue with
+    offered load *a* = arrival_rate / service_rate.
+    """
+    # Erlang B by recursion avoids the factorials
+    b = 1.0
+    for k in range(1, c+1):
+        b = a * b / (k + a * b)
+    rho = a / c
+    return b / (1 - rho * (1 - b))
+
+
+def mmc(arrival_rate, service_rate, c=1):
+    """Utilization, L, Lq, W and Wq of an M/M/c queue.  An unstable queue
+    (utilization >= 1) gets infinite L, Lq, W and Wq.
+    """
+    a = arrival_rate / service_rate
+    rho = a / c
+    if rho >= 1:
+        inf = float('inf')
+        return { 'util': rho, 'L': inf, 'Lq': inf, 'W': inf, 'Wq': inf }
+    lq = erlang_c(a, c) * rho / (1 - rho)
+    wq = lq / arrival_rate if arrival_rate > 0 else 0.0
+    w = wq + 1 / service_rate
+    return { 'util': rho, 'L': arrival_rate * w, 'Lq': lq, 'W': w, 'Wq': wq }
+
+
+def jackson(stations, arrivals, routing=None):
+    """Solve an open Jackson network.  *arrivals* maps a station name to its
+    external arrival rate and *routing* maps a station name to a dict of
+    {next station: probability}; whatever is left over leaves the network.
+    Returns the M/M/c results of every station plus the network totals.
+    """
+    names = [s.name for s in stations]
+    index = dict((name, i) for i, name in enumerate(names))
+    n = len(names)
+    gamma = np.zeros(n)
+    for name, rate in arrivals.items():
+        gamma[index[name]] = rate
+    p = np.zeros((n, n))
+    for name, nexts in (routing or {}).items():
+        for next_name, prob in nexts.items():
+            p[index[name], index[next_name]] = prob
+    # traffic equations: lambda = gamma + P^T lambda
+    lambdas = np.linalg.solve(np.eye(n) - p.T, gamma)
+
+    r = {}
+    total_l = 0.0
+    for s, lam in zip(stations, lambdas):
+        r[s.name] = mmc(float(lam), s.service_rate, s.capacity)
+        r[s.name]['arrival_rate'] = float(lam)
+        total_l += r[s.name]['L']
+    total_gamma = float(gamma.sum())
+    r['network'] = { 'L': total_l, 'W': total_l / total_gamma }
+    return r
+
+
+def compare_monitor(monitor, solution, names=None):
+    """Relative errors of simulated against analytic values: utilization and
+    mean queue length from the Monitor and, when entities were logged with
+    t_queue/t_response, Wq and W.
+    """
+    if names is None:
+        names = monitor.get_names()
+    errors = {}
+    for name in names:
+        expected = solution[name]
+        s = monitor.get_summary(name)['stats']
+        e = { 'util': s['util'] / expected['util'] - 1, 'Lq': s['queue'] / expected['Lq'] - 1 if expected['Lq'] else 0.0 }
+        entity = monitor.get_entity_stats(name)
+        for key, stat in (('Wq', 't_queue'), ('W', 't_response')):
+            if stat in entity.get_metrics() and expected[key]:
+                e[key] = entity.mean(stat) / expected[key] - 1
+        errors[name] = e
+    return errors
+
+
+if __name__ == "__main__":
+    # M/M/1 of the notebook: W = 6.667
+    print(mmc(1/10, 1/4))
+
+    # 5-complex queueing network.py: 80% to 2 ticket machines, 20% to the
+    # ticket office, then everyone goes to the gate
+    stations = [Station('ticket_machine', 2, 1/15), Station('ticket_office', 1, 1/20), Station('gate', 1, 1/10)]
+    arrivals = { 'ticket_machine': 0.8 * 1/10, 'ticket_office': 0.2 * 1/10 }
+    routing = { 'ticket_machine': { 'gate': 1.0 }, 'ticket_office': { 'gate': 1.0 } }
+    for name, stats in jackson(stations, arrivals, routing).items():
+        print(name, stats)
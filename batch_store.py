@@ -0,0 +1,175 @@
+#!/usr/bin/env python
+#
+# Simpy Example - Store with batch gets for the platform/train pattern
+# for 2110636 Performance Evaluation and Analysis Class
+# Natawut Nupairoj, Chulalongkorn University, Thailand
+#
+# In 9-store and event.py a train takes the waiting passengers one
+# platform.get() at a time: one event and one resume of the train process
+# per passenger, and items.pop(0) moves the whole platform each time.
+# get_batch() takes up to N items in one event, waiting for at least
+# *min_items* of them and at most *timeout* time units.
+import simpy
+from simpy.core import BoundClass
+from simpy.resources.store import StoreGet
+from entity_stats import EntityStats
+from resource_monitor import MonitoredResource
+
+
+class BatchGet(StoreGet):
+    """Get of up to *max_items* items (all of them when None) as a list,
+    once at least *min_items* are in the store.  After *timeout* time units
+    it takes what there is, even fewer than *min_items*.
+    """
+    def __init__(self, resource, max_items=None, min_items=1, timeout=None):
+        self.max_items = max_items
+        self.min_items = min_items
+        self.t_get = resource._env.now
+        self.cancelled = False
+        super().__init__(resource)
+        if timeout is not None and not self.triggered:
+            resource._env.timeout(timeout).callbacks.append(self._expire)
+
+    def cancel(self):
+        if not self.triggered:
+            self.cancelled = True
+        super().cancel()
+
+    def _expire(self, timer):
+        if not self.triggered and not self.cancelled:
+            resource = self.resource
+            resource.get_queue.remove(self)
+            resource._take(self)
+
+
+class BatchStore(simpy.Store):
+    """simpy.Store with get_batch() and the records of a MonitoredResource,
+    so that it can be registered with a Monitor: count is the number of
+    items in the store (util * capacity is the mean occupancy) and queue the
+    number of puts waiting for room.  *batches* has the size of every batch
+    and how long its get waited (mean and variance only, unless *quantiles*
+    or *keep_samples* are given).
+    """
+    get_batch = BoundClass(BatchGet)
+
+    def __init__(self, env, capacity=float('inf'), quantiles=(), keep_samples=False):
+        super().__init__(env, capacity)
+        self.log = None
+        self.logger = None
+        self._count = 0
+        self._queue = 0
+        self.batches = EntityStats(quantiles, keep_samples)
+
+    @property
+    def count(self):
+        return len(self.items)
+
+    @property
+    def queue(self):
+        return self.put_queue
+
+    def _do_get(self, event):
+        if not isinstance(event, BatchGet):
+            return simpy.Store._do_get(self, event)
+        if len(self.items) >= event.min_items:
+            self._take(event)
+        return None
+
+    def _take(self, event):
+        n = len(self.items) if event.max_items is None else min(event.max_items, len(self.items))
+        batch = self.items[:n]
+        del self.items[:n]
+        event.succeed(batch)
+        self.batches.add({ 'size': n, 't_wait': self._env._now - event.t_get })
+        count = len(self.items)
+        queue = len(self.put_queue)
+        if count != self._count or queue != self._queue:
+            self._changed(count, queue)
+
+    def _trigger_put(self, get_event):
+        simpy.Store._trigger_put(self, get_event)
+        count = len(self.items)
+        queue = len(self.put_queue)
+        if count != self._count or queue != self._queue:
+            self._changed(count, queue)
+
+    def _trigger_get(self, put_event):
+        simpy.Store._trigger_get(self, put_event)
+        count = len(self.items)
+        queue = len(self.put_queue)
+        if count != self._count or queue != self._queue:
+            self._changed(count, queue)
+
+    # same records as MonitoredResource
+    _changed = MonitoredResource._changed
+
+
+if __name__ == "__main__":
+    import random
+    import time
+    from resource_monitor import Monitor
+
+    # passengers arrive on the platform and every train boards as many as
+    # it has free seats, first one get per passenger and then one batch
+    def passenger(env, platform, boarded):
+        train_arrival_event = env.event()
+        yield platform.put(train_arrival_event)
+        yield train_arrival_event
+        boarded.append(env.now)
+
+    def passenger_generator(env, platform, arrival_rate, boarded):
+        while True:
+            env.process(passenger(env, platform, boarded))
+            yield env.timeout(random.expovariate(arrival_rate))
+
+    def train(env, remaining, platform, batch):
+        if batch:
+            passengers = yield platform.get_batch(remaining, min_items=0)
+            for passenger_ev in passengers:
+                passenger_ev.succeed()
+        else:
+            for i in range(min(remaining, len(platform.items))):
+                passenger_ev = yield platform.get()
+                passenger_ev.succeed()
+        yield env.timeout(0.1)
+
+    def train_generator(env, duration, capacity, platform, batch):
+        while True:
+            yield env.timeout(duration)
+            env.process(train(env, random.randint(0, capacity), platform, batch))
+
+    # about 800 passengers per train, with 2000 seats at most
+    for batch in (False, True):
+        random.seed(1)
+        env = simpy.Environment()
+        platform = BatchStore(env, capacity=100000)
+        m = Monitor()
+        m.register('platform', platform, platform.capacity)
+        boarded = []
+        env.process(passenger_generator(env, platform, 40, boarded))
+        env.process(train_generator(env, 20, 2000, platform, batch))
+        t = time.perf_counter()
+        env.run(until=20000)
+        print('{:12s} {:.2f}s {} boarded, mean boarding time {:.4f}, mean on the platform {:.1f}'.format(
+            'get_batch' if batch else 'one by one', time.perf_counter() - t, len(boarded),
+            sum(boarded) / len(boarded), m.get_summary('platform')['stats']['util'] * platform.capacity))
+    print('batch size mean {:.1f} std {:.1f} over {} trains'.format(
+        platform.batches.mean('size'), platform.batches.std('size'), len(platform.batches)))
+
+    # a train that waits up to 5 time units for at least 3 passengers
+    env = simpy.Environment()
+    platform = BatchStore(env)
+
+    def late_passengers(env, platform):
+        for i in range(4):
+            yield env.timeout(2)
+            yield platform.put(i)
+
+    def waiting_train(env, platform):
+        while True:
+            passengers = yield platform.get_batch(10, min_items=3, timeout=5)
+            print('[{:5.2f}] train leaves with {}'.format(env.now, passengers))
+
+    env.process(late_passengers(env, platform))
+    env.process(waiting_train(env, platform))
+    env.run(until=12)
@@ -0,0 +1,143 @@
+#!/usr/bin/env python
+#
+# Simpy Example - Event throughput benchmark of the tutorial models
+# for 2110636 Performance Evaluation and Analysis Class
+# Natawut Nupairoj, Chulalongkorn University, Thailand
+#
+# python benchmark.py --out bench.json                # run and save
+# python benchmark.py --baseline bench.json           # compare with a saved run
+import argparse
+import json
+import multiprocessing
+import platform
+import random
+import resource
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+import simpy
+from resource_monitor import Monitor
+from models import MODELS, get_model
+from models.common import params_for_load
+
+
+class CountingEnvironment(simpy.Environment):
+    """simpy.Environment that counts the events it processes."""
+    def __init__(self, initial_time=0):
+        super().__init__(initial_time)
+        self.events = 0
+
+    def step(self):
+        self.events += 1
+        simpy.Environment.step(self)
+
+
+LOADS = (0.5, 0.9, 0.99)
+
+
+def run_case(name, rho, until, seed=0, monitored=False):
+    """Run one model in this process and return its event count, wall
+    time and the peak RSS of the process in KB.
+    """
+    model = get_model(name)
+    random.seed(seed)
+    env = CountingEnvironment()
+    monitor = Monitor() if monitored else None
+    model.build_model(params_for_load(model, rho), env, monitor)
+    t = time.perf_counter()
+    env.run(until=until)
+    wall = time.perf_counter() - t
+    return {
+        'events': env.events,
+        'wall': wall,
+        'peak_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    }
+
+
+def run_isolated(name, rho, until, seed=0, monitored=False):
+    # a fresh process per case, so peak RSS belongs to that case only
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+        return executor.submit(run_case, name, rho, until, seed, monitored).result()
+
+
+def benchmark(names=None, loads=LOADS, until=100000, repeat=3, seed=0):
+    """Events/sec, wall time and peak RSS of every model at every load,
+    plain and with a Monitor.  The arrival rate is set so that the busiest
+    station runs at utilization rho (the offered load for the balking
+    model).  With a Monitor, every resource is a registered
+    MonitoredResource and the passengers log their queue and response
+    times.  The best of *repeat* runs is kept.
+    """
+    results = []
+    for name in names or MODELS:
+        for rho in loads:
+            best = {}
+            for monitored in (False, True):
+                runs = [run_isolated(name, rho, until, seed, monitored) for i in range(repeat)]
+                best[monitored] = min(runs, key=lambda r: r['wall'])
+            plain, monitored = best[False], best[True]
+            results.append({
+                'model': name,
+                'rho': rho,
+                'events': plain['events'],
+                'wall': plain['wall'],
+                'events_per_sec': plain['events'] / plain['wall'],
+                'peak_rss_kb': plain['peak_rss_kb'],
+                'monitor_wall': monitored['wall'],
+                'monitor_peak_rss_kb': monitored['peak_rss_kb'],
+                'monitor_overhead': monitored['wall'] / plain['wall'] - 1
+            })
+    return {
+        'python': platform.python_version(),
+        'simpy': simpy.__version__,
+        'machine': platform.machine(),
+        'until': until,
+        'results': results
+    }
+
+
+def compare(report, baseline, tolerance=0.1):
+    """Events/sec of each case against the same case in *baseline*.  A
+    case is a regression when it is more than *tolerance* slower.
+    """
+    base = { (r['model'], r['rho']): r for r in baseline['results'] }
+    rows = []
+    for r in report['results']:
+        b = base.get((r['model'], r['rho']))
+        if b is None:
+            continue
+        ratio = r['events_per_sec'] / b['events_per_sec']
+        rows.append({
+            'model': r['model'],
+            'rho': r['rho'],
+            'events_per_sec': r['events_per_sec'],
+            'baseline_events_per_sec': b['events_per_sec'],
+            'ratio': ratio,
+            'regression': ratio < 1 - tolerance
+        })
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Event throughput of the tutorial models')
+    parser.add_argument('--models', nargs='*', choices=list(MODELS), help='models to run (default: all)')
+    parser.add_argument('--rho', nargs='*', type=float, default=list(LOADS), help='utilization levels')
+    parser.add_argument('--until', type=float, default=100000, help='simulation end time')
+    parser.add_argument('--repeat', type=int, default=3, help='runs per case, the fastest is kept')
+    parser.add_argument('--out', help='write the report to this JSON file')
+    parser.add_argument('--baseline', help='compare with this saved report')
+    parser.add_argument('--tolerance', type=float, default=0.1, help='allowed slowdown against the baseline')
+    args = parser.parse_args()
+
+    report = benchmark(args.models, args.rho, args.until, args.repeat)
+    if args.baseline:
+        with open(args.baseline) as f:
+            report['comparison'] = compare(report, json.load(f), args.tolerance)
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(report, f, indent=2)
+    json.dump(report, sys.stdout, indent=2)
+    print()
+    if any(row['regression'] for row in report.get('comparison', [])):
+        sys.exit(1)
@@ -0,0 +1,60 @@
+#!/usr/bin/env python
+#
+# Simpy Example - Checkpoint, restore and extend simulation runs
+# for 2110636 Performance Evaluation and Analysis Class
+# Natawut Nupairoj, Chulalongkorn University, Thailand
+import pickle
+import random
+
+
+class EntityRegistry(object):
+    """The live entities of a model and what is needed to recreate them.
+    SimPy processes are generators and cannot be saved, so each entity
+    keeps its state here (arrival time, phase, end of service, ...) and the
+    model restarts a process from it when a checkpoint is restored.  Other
+    model state, e.g. the time of the next arrival, goes in *values*.
+    """
+    def __init__(self):
+        self.entities = {}
+        self.values = {}
+
+    def update(self, eid, **state):
+        if eid not in self.entities:
+            self.entities[eid] = { 'id': eid }
+        self.entities[eid].update(state)
+
+    def remove(self, eid):
+        del self.entities[eid]
+
+    def get_entities(self, key=None):
+        """Entity states, ordered by *key* if given."""
+        return sorted(self.entities.values(), key=key) if key else list(self.entities.values())
+
+
+def capture(env, monitor=None, streams=None, registry=None):
+    """Everything needed to continue a run: the clock, the state of the
+    random module, the variate streams, the Monitor and the entities.
+    """
+    return {
+        'clock': env.now,
+        'random': random.getstate(),
+        'streams': streams,
+        'monitor': monitor,
+        'registry': registry
+    }
+
+
+def save_checkpoint(path, env, monitor=None, streams=None, registry=None):
+    with open(path, 'wb') as f:
+        pickle.dump(capture(env, monitor, streams, registry), f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def load_checkpoint(path):
+    """Load a checkpoint and put the random module back in its state.  The
+    model then builds a simpy.Environment(initial_time=state['clock']),
+    rebinds the Monitor to its new resources and restarts the entities.
+    """
+    with open(path, 'rb') as f:
+        state = pickle.load(f)
+    random.setstate(state['random'])
+    return state
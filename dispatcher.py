@@ -0,0 +1,200 @@
+#!/usr/bin/env python
+#
+# Simpy Example - Dispatching arrivals over many servers
+# for 2110636 Performance Evaluation and Analysis Class
+# Natawut Nupairoj, Chulalongkorn University, Thailand
+#
+# find_shortest_queues scans every server on every arrival.  The Dispatcher
+# keeps the number of entities at each server (users plus queue) up to date
+# from the resources' own request and release triggers, and the servers in
+# an indexed heap on that number, so choosing a server costs O(log n)
+# instead of O(n).
+import heapq
+import random
+from functools import partial
+from resource_monitor import patch_resource
+
+
+class IndexedHeap(object):
+    """Min-heap of the items 0..n-1 by key, with the position of every item
+    so that its key can be changed in O(log n).  Equal keys are ordered by
+    item, so the top is the first item with the smallest key.
+    """
+    def __init__(self, keys):
+        self.keys = list(keys)
+        self.heap = sorted(range(len(self.keys)), key=lambda i: (self.keys[i], i))
+        self.pos = [0] * len(self.keys)
+        for k, i in enumerate(self.heap):
+            self.pos[i] = k
+
+    def __len__(self):
+        return len(self.heap)
+
+    def top(self):
+        return self.heap[0]
+
+    def _less(self, a, b):
+        return self.keys[a] < self.keys[b] or (self.keys[a] == self.keys[b] and a < b)
+
+    def _swap(self, k, j):
+        heap = self.heap
+        heap[k], heap[j] = heap[j], heap[k]
+        self.pos[heap[k]] = k
+        self.pos[heap[j]] = j
+
+    def update(self, item, key):
+        old = self.keys[item]
+        self.keys[item] = key
+        k = self.pos[item]
+        heap = self.heap
+        if key < old:
+            while k > 0:
+                parent = (k - 1) >> 1
+                if not self._less(item, heap[parent]):
+                    break
+                self._swap(k, parent)
+                k = parent
+        else:
+            n = len(heap)
+            while True:
+                child = 2*k + 1
+                if child >= n:
+                    break
+                if child + 1 < n and self._less(heap[child + 1], heap[child]):
+                    child += 1
+                if not self._less(heap[child], item):
+                    break
+                self._swap(k, child)
+                k = child
+
+
+class Dispatcher(object):
+    """Chooses a server for each arrival with dispatch().  *servers* are
+    SimPy resources, or objects with the resource in their .resource
+    attribute (the Server helper of the examples).  The number of entities
+    at each server is read from the resource whenever a request or release
+    triggers it, so cancelled requests, reneging and interrupts are
+    counted without any call from the entities.  Policies:
+      'jsq'          join the shortest queue (fewest entities), O(log n)
+      'power_of_d'   the shortest of *d* servers picked at random, O(d)
+      'round_robin'  each server in turn, O(1)
+      'least_work'   the server that finishes its work first, O(log n);
+                     dispatch(work) needs the service time of the entity
+                     and the servers are taken as single FIFO servers
+    Ties go to the server that comes first in *servers*, as in
+    find_shortest_queues.
+    """
+    POLICIES = ('jsq', 'power_of_d', 'round_robin', 'least_work')
+
+    def __init__(self, env, servers, policy='jsq', d=2, rng=random):
+        if policy not in self.POLICIES:
+            raise ValueError('unknown policy {}, use one of {}'.format(policy, ', '.join(self.POLICIES)))
+        self.env = env
+        self.servers = list(servers)
+        self.policy = policy
+        self.d = min(d, len(self.servers))
+        self.rng = rng
+        self.index = dict((id(s), i) for i, s in enumerate(self.servers))
+        self.resources = [getattr(s, 'resource', s) for s in self.servers]
+        self.load = [r.count + len(r.queue) for r in self.resources]
+        self.next = 0
+        if policy == 'jsq':
+            self.heap = IndexedHeap(self.load)
+        for i, r in enumerate(self.resources):
+            update = partial(self._update, i)
+            patch_resource(r, '_trigger_put', post=update)
+            patch_resource(r, '_trigger_get', post=update)
+        if policy == 'least_work':
+            # when each busy server will have finished the work sent to
+            # it, and the idle servers by index
+            self.heap = IndexedHeap([float('inf')] * len(self.servers))
+            self.idle = list(range(len(self.servers)))
+
+    def dispatch(self, work=0):
+        """Server for a new arrival and the number of entities it had, as
+        returned by find_shortest_queues.
+        """
+        if self.policy == 'jsq':
+            i = self.heap.top()
+        elif self.policy == 'power_of_d':
+            load = self.load
+            i = min(self.rng.sample(range(len(load)), self.d), key=lambda k: (load[k], k))
+        elif self.policy == 'round_robin':
+            i = self.next
+            self.next = (i + 1) % len(self.servers)
+        else:
+            # servers whose work is done move to the idle heap, where the
+            # first one in *servers* is chosen, as for ties in jsq
+            heap = self.heap
+            now = self.env.now
+            while heap.keys[heap.top()] <= now:
+                heapq.heappush(self.idle, heap.top())
+                heap.update(heap.top(), float('inf'))
+            if self.idle:
+                i = heapq.heappop(self.idle)
+                heap.update(i, now + work)
+            else:
+                i = heap.top()
+                heap.update(i, heap.keys[i] + work)
+        return self.servers[i], self.load[i]
+
+    def _update(self, i, func_name, step, resource):
+        n = resource.count + len(resource.queue)
+        if n != self.load[i]:
+            self.load[i] = n
+            if self.policy == 'jsq':
+                self.heap.update(i, n)
+
+    def get_load(self, server):
+        return self.load[self.index[id(server)]]
+
+
+if __name__ == "__main__":
+    import time
+    import simpy
+
+    def find_shortest_queues(servers):
+        min_n = -1
+        min_s = None
+        for s in servers:
+            n_in_server = s.count + len(s.queue)
+            if n_in_server < min_n or min_n == -1:
+                min_n = n_in_server
+                min_s = s
+        return min_s, min_n
+
+    def customer(env, servers, service_rate, dispatcher, waits):
+        t_arrival = env.now
+        work = random.expovariate(service_rate)
+        if dispatcher is None:
+            server, n = find_shortest_queues(servers)
+        else:
+            server, n = dispatcher.dispatch(work)
+        with server.request() as request:
+            yield request
+            waits.append(env.now - t_arrival)
+            yield env.timeout(work)
+
+    def customer_generator(env, servers, arrival_rate, service_rate, dispatcher, waits):
+        while True:
+            env.process(customer(env, servers, service_rate, dispatcher, waits))
+            yield env.timeout(random.expovariate(arrival_rate))
+
+    def farm(n_servers, policy, until):
+        # n_servers counters at 90% utilization
+        random.seed(1)
+        env = simpy.Environment()
+        servers = [simpy.Resource(env, capacity=1) for i in range(n_servers)]
+        dispatcher = Dispatcher(env, servers, policy) if policy else None
+        waits = []
+        env.process(customer_generator(env, servers, 0.9 * n_servers / 10, 1/10, dispatcher, waits))
+        t = time.perf_counter()
+        env.run(until=until)
+        return time.perf_counter() - t, sum(waits) / len(waits), len(waits)
+
+    # the linear scan and 'jsq' choose the same servers, so they give the same waits
+    for n_servers in (3, 100, 500):
+        for policy in (None, 'jsq', 'power_of_d', 'round_robin', 'least_work'):
+            wall, wait, n = farm(n_servers, policy, 2000 if n_servers > 3 else 50000)
+            print('{:3d} servers {:12s} {:6.3f}s mean wait {:7.3f} ({} customers)'.format(
+                n_servers, policy or 'linear scan', wall, wait, n))
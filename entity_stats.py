@@ -0,0 +1,203 @@
+#!/usr/bin/env python
+#
+# Simpy Example - Online statistics of entities (mean, variance, quantiles)
+# for 2110636 Performance Evaluation and Analysis Class
+# Natawut Nupairoj, Chulalongkorn University, Thailand
+from array import array
+import math
+import numpy as np
+
+
+class P2Quantile(object):
+    """P-square estimate of the *p* quantile (Jain & Chlamtac, 1985) in
+    constant memory: five markers are moved as the samples arrive.
+    """
+    def __init__(self, p):
+        self.p = p
+        self.heights = []
+        self.positions = [1, 2, 3, 4, 5]
+        self.desired = [1, 1 + 2*p, 1 + 4*p, 3 + 2*p, 5]
+        self.increments = [0, p/2, p, (1 + p)/2, 1]
+
+    def add(self, x):
+        q = self.heights
+        if len(q) < 5:
+            q.append(x)
+            q.sort()
+            return
+
+        # find the cell of x and move the extreme markers if needed
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = 0
+            while x >= q[k+1]:
+                k += 1
+        n = self.positions
+        for i in range(k+1, 5):
+            n[i] += 1
+        for i in range(5):
+            self.desired[i] += self.increments[i]
+
+        # adjust the middle markers with the parabolic formula, or the
+        # linear one when the parabola would break the ordering
+        for i in range(1, 4):
+            d = self.desired[i] - n[i]
+            if (d >= 1 and n[i+1] - n[i] > 1) or (d <= -1 and n[i-1] - n[i] < -1):
+                d = 1 if d > 0 else -1
+                h = q[i] + d / (n[i+1] - n[i-1]) * ((n[i] - n[i-1] + d) * (q[i+1] - q[i]) / (n[i+1] - n[i])
+                                                   + (n[i+1] - n[i] - d) * (q[i] - q[i-1]) / (n[i] - n[i-1]))
+                if not q[i-1] < h < q[i+1]:
+                    h = q[i] + d * (q[i+d] - q[i]) / (n[i+d] - n[i])
+                q[i] = h
+                n[i] += d
+
+    def add_many(self, x):
+        """Add a block of samples.  A fresh estimator starts from the exact
+        marker heights and positions of the block, which is what P-square
+        would be tracking after those samples; otherwise they are added
+        one at a time.
+        """
+        x = np.asarray(x, dtype=float)
+        f = np.array(self.increments)
+        positions = 1 + np.rint((x.size - 1) * f).astype(int)
+        if self.heights or x.size < 5 or np.any(np.diff(positions) <= 0):
+            for v in x.tolist():
+                self.add(v)
+            return
+        self.heights = np.partition(x, positions - 1)[positions - 1].tolist()
+        self.positions = positions.tolist()
+        self.desired = (1 + (x.size - 1) * f).tolist()
+
+    def value(self):
+        q = self.heights
+        if not q:
+            return float('nan')
+        if len(q) < 5:
+            # exact quantile of the few samples seen so far
+            return q[min(len(q) - 1, int(round(self.p * (len(q) - 1))))]
+        return q[2]
+
+
+class EntityStats(object):
+    """Statistics of the entities leaving a resource, one set per metric
+    (t_queue, t_response, ...): count, Welford mean/variance, P-square
+    quantiles and, when *keep_samples* is set, the raw samples in a
+    columnar array.
+    """
+    def __init__(self, quantiles=(0.5, 0.9, 0.99), keep_samples=True):
+        self.quantiles = quantiles
+        self.keep_samples = keep_samples
+        self.count = 0
+        self._moments = {}
+        self._quantiles = {}
+        self._samples = {}
+
+    def add(self, stats):
+        self.count += 1
+        for key, x in stats.items():
+            m = self._moments.get(key)
+            if m is None:
+                m = self._moments[key] = [0, 0.0, 0.0]
+                self._quantiles[key] = [P2Quantile(p) for p in self.quantiles]
+                self._samples[key] = array('d')
+            # Welford update of n, mean and the sum of squared deviations
+            m[0] += 1
+            delta = x - m[1]
+            m[1] += delta / m[0]
+            m[2] += delta * (x - m[1])
+            for q in self._quantiles[key]:
+                q.add(x)
+            if self.keep_samples:
+                self._samples[key].append(x)
+
+    def add_many(self, columns):
+        """Add a block of entities given as {metric: array of values}, all
+        of the same length.  The moments are merged with Chan's formula.
+        Raises ValueError when the columns differ in length.
+        """
+        columns = dict((key, np.ascontiguousarray(x, dtype=float)) for key, x in columns.items())
+        sizes = set(x.size for x in columns.values())
+        if len(sizes) > 1:
+            raise ValueError('columns have different lengths: {}'.format(
+                dict((key, x.size) for key, x in columns.items())))
+        n = sizes.pop() if sizes else 0
+        if n == 0:
+            return
+        for key, x in columns.items():
+            m = self._moments.get(key)
+            if m is None:
+                m = self._moments[key] = [0, 0.0, 0.0]
+                self._quantiles[key] = [P2Quantile(p) for p in self.quantiles]
+                self._samples[key] = array('d')
+            mean = float(x.mean())
+            m2 = float(((x - mean)**2).sum())
+            total = m[0] + n
+            delta = mean - m[1]
+            m[2] += m2 + delta * delta * m[0] * n / total
+            m[1] += delta * n / total
+            m[0] = total
+            for q in self._quantiles[key]:
+                q.add_many(x)
+            if self.keep_samples:
+                self._samples[key].frombytes(x.tobytes())
+        self.count += n
+
+    def __len__(self):
+        return self.count
+
+    def get_metrics(self):
+        return list(self._moments)
+
+    def mean(self, key):
+        return self._moments[key][1]
+
+    def var(self, key):
+        n, mean, m2 = self._moments[key]
+        return m2 / (n - 1) if n > 1 else 0.0
+
+    def std(self, key):
+        return math.sqrt(self.var(key))
+
+    def quantile(self, key, p):
+        for q in self._quantiles[key]:
+            if q.p == p:
+                return q.value()
+        raise ValueError('quantile {} of {} is not tracked'.format(p, key))
+
+    def samples(self, key):
+        """Raw samples of a metric as a NumPy array.  It is a copy, so the
+        run can go on adding samples while the caller holds it.
+        """
+        return np.array(self._samples[key], dtype=float)
+
+    def running_mean(self, key):
+        x = self.samples(key)
+        return np.cumsum(x) / np.arange(1, x.size + 1)
+
+    def summary(self):
+        r = {}
+        for key in self._moments:
+            s = { 'count': self._moments[key][0], 'mean': self.mean(key), 'std': self.std(key) }
+            for q in self._quantiles[key]:
+                s['p{:g}'.format(100 * q.p)] = q.value()
+            r[key] = s
+        return r
+
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(1234)
+    x = rng.exponential(10, 100000)
+    e = EntityStats()
+    for v in x:
+        e.add({ 't_response': float(v) })
+    print(e.summary())
+    print('exact', x.mean(), x.std(ddof=1), np.quantile(x, [0.5, 0.9, 0.99]))
+    e = EntityStats()
+    e.add_many({ 't_response': x[:50000] })
+    e.add_many({ 't_response': x[50000:] })
+    print('blocks', e.summary())
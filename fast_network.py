@@ -0,0 +1,169 @@
+#!/usr/bin/env python
+#
+# Simpy Example - Batched engine for feed-forward networks of FIFO stations
+# for 2110636 Performance Evaluation and Analysis Class
+# Natawut Nupairoj, Chulalongkorn University, Thailand
+#
+# The topology is given as for analytic.jackson: stations with name,
+# capacity and service_rate, external arrival rates and routing
+# probabilities.  Stations are visited in topological order; each one gets
+# the merged array of customers coming from outside and from the stations
+# before it and runs them through lindley.fifo_starts.  The results are a
+# closed Monitor, one resource per station.
+import numpy as np
+from analytic import Station
+from lindley import fifo_starts, attach_results, poisson_arrivals
+from resource_monitor import Monitor
+
+
+def topological_order(names, routing):
+    """Station names so that every station comes after those routing to it.
+    Raises ValueError when the routing has a cycle.
+    """
+    incoming = dict((name, 0) for name in names)
+    for name, nexts in routing.items():
+        for next_name, prob in nexts.items():
+            if prob > 0:
+                incoming[next_name] += 1
+    order = [name for name in names if incoming[name] == 0]
+    for name in order:
+        for next_name, prob in routing.get(name, {}).items():
+            if prob > 0:
+                incoming[next_name] -= 1
+                if incoming[next_name] == 0:
+                    order.append(next_name)
+    if len(order) < len(names):
+        raise ValueError('routing has a cycle, only feed-forward networks are supported')
+    return order
+
+
+def simulate_network(stations, arrivals, routing, end, seed=0, begin=0, services=None, monitor=None):
+    """Run a feed-forward network of FIFO stations from *begin* to *end*.
+    *arrivals* maps a station name to an external arrival rate (Poisson) or
+    to an array of arrival times.  *services* maps a station name to a
+    function (rng, n) returning n service times; by default they are
+    exponential with the station's service_rate.  Each station becomes a
+    resource of the returned Monitor, with entity stats t_queue and
+    t_response at the station and t_system since entering the network.
+    """
+    routing = routing or {}
+    services = services or {}
+    monitor = monitor or Monitor()
+    rng = np.random.default_rng(seed)
+    by_name = dict((s.name, s) for s in stations)
+    # customers waiting to enter each station: (arrival times, network entry times)
+    inbox = dict((s.name, []) for s in stations)
+    for name, a in arrivals.items():
+        if np.isscalar(a):
+            a = poisson_arrivals(rng, a, begin, end)
+        a = np.asarray(a, dtype=float)
+        inbox[name].append((a, a))
+
+    for name in topological_order([s.name for s in stations], routing):
+        s = by_name[name]
+        if inbox[name]:
+            t_arrival = np.concatenate([a for a, t in inbox[name]])
+            t_entry = np.concatenate([t for a, t in inbox[name]])
+            order = np.argsort(t_arrival, kind='stable')
+            t_arrival, t_entry = t_arrival[order], t_entry[order]
+            keep = t_arrival < end
+            t_arrival, t_entry = t_arrival[keep], t_entry[keep]
+        else:
+            t_arrival = t_entry = np.empty(0)
+        if name in services:
+            service = np.asarray(services[name](rng, t_arrival.size), dtype=float)
+        else:
+            service = rng.exponential(1/s.service_rate, t_arrival.size)
+        starts = fifo_starts(t_arrival, service, s.capacity)
+        departures = starts + service
+        attach_results(monitor, name, t_arrival, starts, departures, s.capacity, begin, end, t_entry)
+
+        # send the customers that left before the end to the next stations
+        nexts = list(routing.get(name, {}).items())
+        if nexts:
+            done = departures < end
+            leaving, entry = departures[done], t_entry[done]
+            choice = np.searchsorted(np.cumsum([prob for next_name, prob in nexts]), rng.random(leaving.size),
+                                     side='right')
+            for k, (next_name, prob) in enumerate(nexts):
+                picked = choice == k
+                inbox[next_name].append((leaving[picked], entry[picked]))
+    return monitor
+
+
+def queueing_network(params=None):
+    """Topology of 4-queueing network: ticket office then gate."""
+    from models.common import with_defaults
+    from models.queueing_network import DEFAULTS
+    p = with_defaults(DEFAULTS, params)
+    stations = [Station('ticket_office', 1, 1/p['TO_MEAN_SERVICE_TIME']),
+                Station('gate', 1, 1/p['GA_MEAN_SERVICE_TIME'])]
+    arrivals = { 'ticket_office': 1/p['MEAN_INTER_ARRIVAL_TIME'] }
+    routing = { 'ticket_office': { 'gate': 1.0 } }
+    return stations, arrivals, routing, {}
+
+
+def complex_network(params=None):
+    """Topology of 5-complex queueing network (and of 9-store and event up
+    to the gate with its defaults): a share of the passengers go to the
+    ticket machines, the others to the office, then all go to the gate.
+    """
+    from models.common import with_defaults
+    from models.complex_network import DEFAULTS
+    p = with_defaults(DEFAULTS, params)
+    stations = [Station('ticket_machine', 2, 1/p['TM_MEAN_SERVICE_TIME']),
+                Station('ticket_office', 1, 1/p['TO_MEAN_SERVICE_TIME']),
+                Station('gate', 1, 1/p['GA_MEAN_SERVICE_TIME'])]
+    # one Poisson stream split at random is two independent Poisson streams
+    rate = 1/p['MEAN_INTER_ARRIVAL_TIME']
+    arrivals = { 'ticket_machine': p['MACHINE_SHARE'] * rate, 'ticket_office': (1 - p['MACHINE_SHARE']) * rate }
+    routing = { 'ticket_machine': { 'gate': 1.0 }, 'ticket_office': { 'gate': 1.0 } }
+    services = {}
+    extra = p['SERVICE_TIME_OFFSET']
+    if extra:
+        for s in stations:
+            services[s.name] = lambda rng, n, mean=1/s.service_rate: rng.exponential(mean, n) + extra
+    return stations, arrivals, routing, services
+
+
+def run(topology, params=None, seed=0):
+    """Run a topology function (queueing_network, complex_network) with the
+    parameters of its SimPy model until SIMULATION_END_TIME and return the
+    Monitor, like models.<model>.run.
+    """
+    from models.common import with_defaults
+    stations, arrivals, routing, services = topology(params)
+    end = with_defaults({ 'SIMULATION_END_TIME': 20000 }, params)['SIMULATION_END_TIME']
+    return simulate_network(stations, arrivals, routing, end, seed, services=services)
+
+
+if __name__ == "__main__":
+    import time
+    from analytic import jackson, compare_monitor
+    from models import get_model
+    from models.common import params_for_load
+    from replication import summarize_monitor
+
+    for name, topology in (('4-queueing network', queueing_network), ('5-complex queueing network', complex_network)):
+        model = get_model(name)
+        params = params_for_load(model, 0.9)
+        params['SIMULATION_END_TIME'] = 200000
+        t = time.perf_counter()
+        slow = summarize_monitor(model.run(params, 1))
+        t_simpy = time.perf_counter() - t
+        t = time.perf_counter()
+        fast = run(topology, params, 1)
+        t_fast = time.perf_counter() - t
+        print('{}: simpy {:.2f}s fast {:.3f}s ({:.0f}x)'.format(name, t_simpy, t_fast, t_simpy / t_fast))
+        for node, s in summarize_monitor(fast).items():
+            print('\t{:15s} simpy util {:.3f} queue {:6.3f}  fast util {:.3f} queue {:6.3f}'.format(
+                node, slow[node]['util'], slow[node]['queue'], s['util'], s['queue']))
+        stations, arrivals, routing, services = topology(params)
+        print('\tvs jackson', compare_monitor(fast, jackson(stations, arrivals, routing)))
+
+    # a million passengers through the complex network
+    params = { 'MEAN_INTER_ARRIVAL_TIME': 11, 'SIMULATION_END_TIME': 11000000 }
+    t = time.perf_counter()
+    monitor = run(complex_network, params, 2)
+    print('{} passengers in {:.2f}s'.format(len(monitor.get_entity_stats('gate')), time.perf_counter() - t))
+    print(monitor.get_stats('gate', 0, 11000000), monitor.get_entity_stats('gate').mean('t_system'))
@@ -0,0 +1,194 @@
+#!/usr/bin/env python
+#
+# Simpy Example - Resource with balking and reneging built in
+# for 2110636 Performance Evaluation and Analysis Class
+# Natawut Nupairoj, Chulalongkorn University, Thailand
+#
+# 7-balking and reneging.py waits with `request | env.timeout(wait_limit)`:
+# a Condition, a Timeout and their callbacks per passenger, and timeouts of
+# passengers already served stay in the event queue until they expire.
+# Here the deadlines of all waiting requests are kept in one heap with a
+# single timer for the earliest one.  Requests that were granted or
+# cancelled are dropped from the heap when they reach the top.
+import heapq
+import simpy
+from simpy.core import BoundClass
+from simpy.events import Event
+from simpy.resources.resource import Request
+from entity_stats import EntityStats
+from resource_monitor import MonitoredResource
+
+
+class ImpatientRequest(Request):
+    """Request that balks when the queue is full and reneges after
+    *patience* time units in the queue.  After `yield request`, check
+    request.balked (before yielding is enough) and request.reneged.
+    """
+    def __init__(self, resource, patience=None):
+        self.patience = patience
+        self.t_request = resource._env.now
+        self.balked = False
+        self.reneged = False
+        self.cancelled = False
+        if resource.queue_limit is not None and len(resource.put_queue) >= resource.queue_limit:
+            # queue is full: never joins it
+            Event.__init__(self, resource._env)
+            self.resource = resource
+            self.proc = self.env.active_process
+            self.balked = True
+            resource.balked += 1
+            self.succeed()
+            return
+        super().__init__(resource)
+        if patience is not None and not self.triggered:
+            resource._add_deadline(self)
+
+    def cancel(self):
+        if not self.triggered:
+            self.cancelled = True
+        super().cancel()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self.balked or self.reneged:
+            # never got the resource, nothing to release
+            return None
+        return super().__exit__(exc_type, exc_value, traceback)
+
+
+class ImpatientResource(MonitoredResource):
+    """MonitoredResource with a queue of at most *queue_limit* requests
+    (more arrivals balk) and requests that leave the queue after their
+    patience.  Counts of balked, reneged and served requests are kept, and
+    *waits* has the t_queue of the served requests and the t_renege of
+    those that gave up (mean and variance only, unless *quantiles* or
+    *keep_samples* are given).
+    """
+    request = BoundClass(ImpatientRequest)
+
+    def __init__(self, env, capacity=1, queue_limit=None, quantiles=(), keep_samples=False):
+        super().__init__(env, capacity)
+        self.queue_limit = queue_limit
+        self.balked = 0
+        self.reneged = 0
+        self.served = 0
+        self.waits = EntityStats(quantiles, keep_samples)
+        self._deadlines = []
+        self._seq = 0
+        self._timer = None
+        self._timer_at = None
+
+    def _do_put(self, event):
+        if len(self.users) < self.capacity:
+            self.users.append(event)
+            event.usage_since = self._env._now
+            event.succeed()
+            self.served += 1
+            self.waits.add({ 't_queue': self._env._now - event.t_request })
+
+    def _add_deadline(self, request):
+        deadline = request.t_request + request.patience
+        self._seq += 1
+        heapq.heappush(self._deadlines, (deadline, self._seq, request))
+        if self._timer is None or deadline < self._timer_at:
+            self._arm()
+
+    def _arm(self):
+        # drop the requests that no longer wait, then set the timer for
+        # the first one that does
+        deadlines = self._deadlines
+        while deadlines and (deadlines[0][2].triggered or deadlines[0][2].cancelled):
+            heapq.heappop(deadlines)
+        if not deadlines:
+            self._timer = None
+            return
+        deadline = deadlines[0][0]
+        if self._timer is not None and self._timer_at <= deadline:
+            return
+        self._timer_at = deadline
+        self._timer = self._env.timeout(max(deadline - self._env._now, 0))
+        self._timer.callbacks.append(self._expire)
+
+    def _expire(self, timer):
+        if timer is not self._timer:
+            # replaced by an earlier timer
+            return
+        self._timer = None
+        now = self._env._now
+        deadlines = self._deadlines
+        reneged = False
+        while deadlines and deadlines[0][0] <= now:
+            request = heapq.heappop(deadlines)[2]
+            if request.triggered or request.cancelled:
+                continue
+            self.put_queue.remove(request)
+            request.reneged = True
+            request.succeed()
+            self.reneged += 1
+            self.waits.add({ 't_renege': now - request.t_request })
+            reneged = True
+        if reneged:
+            count = len(self.users)
+            queue = len(self.put_queue)
+            if count != self._count or queue != self._queue:
+                self._changed(count, queue)
+        self._arm()
+
+    def get_counts(self):
+        return { 'served': self.served, 'balked': self.balked, 'reneged': self.reneged }
+
+
+if __name__ == "__main__":
+    import random
+    import time
+    from resource_monitor import Monitor
+
+    # 7-balking and reneging, first as in the tutorial and then with the
+    # ImpatientResource; both see the same arrival and service times
+    def passenger(env, office, counts, queue_limit, wait_limit):
+        if len(office.queue) >= queue_limit:
+            counts['balked'] += 1
+            return
+        with office.request() as request:
+            results = yield request | env.timeout(wait_limit)
+            if request in results:
+                counts['served'] += 1
+                yield env.timeout(random.expovariate(1/8))
+            else:
+                counts['reneged'] += 1
+
+    def impatient_passenger(env, office, counts, queue_limit, wait_limit):
+        with office.request(patience=wait_limit) as request:
+            if request.balked:
+                return
+            yield request
+            if request.reneged:
+                return
+            yield env.timeout(random.expovariate(1/8))
+
+    def passenger_generator(env, office, arrival_rate, passenger, counts, queue_limit, wait_limit):
+        while True:
+            env.process(passenger(env, office, counts, queue_limit, wait_limit))
+            yield env.timeout(random.expovariate(arrival_rate))
+
+    for arrival_rate, queue_limit in ((1/5, 2), (1, 1000)):
+        for impatient in (False, True):
+            random.seed(1)
+            env = simpy.Environment()
+            m = Monitor()
+            if impatient:
+                office = ImpatientResource(env, 1, queue_limit)
+            else:
+                office = MonitoredResource(env, 1)
+            m.register('office', office, 1)
+            counts = { 'served': 0, 'balked': 0, 'reneged': 0 }
+            env.process(passenger_generator(env, office, arrival_rate, impatient_passenger if impatient else passenger,
+                                            counts, queue_limit, 6))
+            t = time.perf_counter()
+            env.run(until=200000)
+            wall = time.perf_counter() - t
+            if impatient:
+                counts = office.get_counts()
+            print('rate {:.1f} {:18s} {:.2f}s {} {}'.format(arrival_rate, 'impatient' if impatient else 'request | timeout',
+                                                          wall, counts, m.get_summary('office')['stats']))
+        print('\tmean wait of served {:.3f}, of reneged {:.3f}'.format(office.waits.mean('t_queue'),
+                                                                      office.waits.mean('t_renege')))
@@ -0,0 +1,231 @@
+#!/usr/bin/env python
+#
+# Simpy Example - Fast path for FIFO stations with the Lindley recursion
+# for 2110636 Performance Evaluation and Analysis Class
+# Natawut Nupairoj, Chulalongkorn University, Thailand
+#
+# A FIFO station whose customers do not interact (3-resource, 11-monitor,
+# the M/M/1 of the notebook) needs no processes: the start of service of
+# every customer follows from the arrival and service times alone.
+#   c = 1   W[n] = max(0, W[n-1] + S[n-1] - (A[n] - A[n-1]))     (Lindley)
+#           computed over NumPy arrays as W = P - min(0, running min of P),
+#           P being the running sum of S[n-1] - (A[n] - A[n-1])
+#   c > 1   each customer takes the server that frees first      (Kiefer-Wolfowitz)
+# The results go into a Monitor as a closed resource, so get_stats,
+# get_stats_many, get_summary and get_entity_stats work as for a SimPy run.
+import heapq
+import numpy as np
+from entity_stats import EntityStats
+from resource_monitor import Monitor
+from results_export import build_index
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+
+def lindley_waits(arrivals, services, block_size=1<<16):
+    """Waiting times in queue of a FIFO single server.  The running sums
+    restart every *block_size* customers to keep the rounding error small.
+    """
+    arrivals = np.asarray(arrivals, dtype=float)
+    services = np.asarray(services, dtype=float)
+    waits = np.empty(arrivals.size)
+    w = 0.0
+    for b in range(0, arrivals.size, block_size):
+        e = min(b + block_size, arrivals.size)
+        x = np.empty(e - b)
+        if b == 0:
+            x[0] = 0.0
+        else:
+            x[0] = w + services[b-1] - (arrivals[b] - arrivals[b-1])
+        x[1:] = services[b:e-1] - np.diff(arrivals[b:e])
+        p = np.cumsum(x)
+        waits[b:e] = p - np.minimum(np.minimum.accumulate(p), 0.0)
+        w = waits[e-1]
+    return waits
+
+
+def _multi_server_starts(arrivals, services, capacity):
+    # heap of the times the servers become free
+    free = [float('-inf')] * capacity
+    starts = []
+    for a, s in zip(arrivals.tolist(), services.tolist()):
+        f = free[0]
+        t = a if a > f else f
+        heapq.heapreplace(free, t + s)
+        starts.append(t)
+    return np.array(starts)
+
+
+if njit is not None:
+    @njit(cache=True)
+    def _multi_server_kernel(arrivals, services, capacity):
+        free = np.full(capacity, -np.inf)
+        starts = np.empty(arrivals.size)
+        for i in range(arrivals.size):
+            k = 0
+            for j in range(1, capacity):
+                if free[j] < free[k]:
+                    k = j
+            t = max(arrivals[i], free[k])
+            free[k] = t + services[i]
+            starts[i] = t
+        return starts
+
+
+def fifo_starts(arrivals, services, capacity=1):
+    """Start of service of each customer at a FIFO station with
+    *capacity* servers.  *arrivals* must be sorted.
+    """
+    arrivals = np.asarray(arrivals, dtype=float)
+    services = np.asarray(services, dtype=float)
+    if capacity == 1:
+        return arrivals + lindley_waits(arrivals, services)
+    if njit is not None:
+        return _multi_server_kernel(arrivals, services, capacity)
+    return _multi_server_starts(arrivals, services, capacity)
+
+
+def station_log(arrivals, departures, capacity, begin, end):
+    """Cleaned count/queue log of a FIFO station with its prefix-sum index,
+    the same records a MonitoredResource would give: one per clock, with
+    the state after every change at that clock.
+    """
+    arrivals = arrivals[arrivals < end]
+    departures = departures[departures < end]
+    times = np.concatenate(([begin], arrivals, departures))
+    delta = np.concatenate(([0], np.ones(arrivals.size, dtype=int), -np.ones(departures.size, dtype=int)))
+    order = np.argsort(times, kind='stable')
+    times = times[order]
+    in_system = np.cumsum(delta[order])
+    last = np.append(np.flatnonzero(np.diff(times) > 0), times.size - 1)
+    count = np.minimum(in_system[last], capacity).astype(np.intc)
+    queue = (in_system[last] - count).astype(np.intc)
+    return build_index(times[last], count, queue)
+
+
+def attach_results(monitor, name, arrivals, starts, departures, capacity=1, begin=0, end=None, t_entry=None):
+    """Add a FIFO station to *monitor* as resource *name* from the arrival,
+    start and departure times of its customers, with the t_queue and
+    t_response of those that left before *end* in order of departure.
+    *t_entry*, when given, is when each customer entered the network, and
+    the time since then is added as t_system.
+    """
+    if end is None:
+        end = departures.max() if departures.size else begin
+    done = np.flatnonzero(departures < end)
+    if capacity > 1:
+        done = done[np.argsort(departures[done], kind='stable')]
+    columns = { 't_queue': starts[done] - arrivals[done], 't_response': departures[done] - arrivals[done] }
+    if t_entry is not None:
+        columns['t_system'] = departures[done] - t_entry[done]
+    entity = EntityStats(monitor.quantiles, monitor.keep_samples)
+    entity.add_many(columns)
+
+    e = { 'name': name, 'capacity': capacity, 'begin': begin, 'end': end, 'entity': entity,
+          'stats': station_log(arrivals, departures, capacity, begin, end) }
+    monitor.attach(name, e)
+    e['summary'] = monitor.get_stats(name, begin, end)
+    return monitor
+
+
+def attach_station(monitor, name, arrivals, services, capacity=1, begin=0, end=None):
+    """Run a FIFO station over whole arrays of arrival and service times and
+    add it to *monitor* as resource *name* (see attach_results).
+    """
+    arrivals = np.asarray(arrivals, dtype=float)
+    services = np.asarray(services, dtype=float)
+    starts = fifo_starts(arrivals, services, capacity)
+    return attach_results(monitor, name, arrivals, starts, starts + services, capacity, begin, end)
+
+
+def poisson_arrivals(rng, arrival_rate, begin, end):
+    # the first passenger comes at *begin*, as with the SimPy generators;
+    # a source with rate 0 sends nobody
+    if arrival_rate <= 0:
+        return np.empty(0)
+    gaps = rng.exponential(1/arrival_rate, int((end - begin) * arrival_rate * 1.1) + 100)
+    arrivals = begin + np.concatenate(([0.0], np.cumsum(gaps)))
+    while arrivals[-1] < end:
+        gaps = rng.exponential(1/arrival_rate, gaps.size)
+        arrivals = np.concatenate((arrivals, arrivals[-1] + np.cumsum(gaps)))
+    return arrivals[arrivals < end]
+
+
+def run(params=None, seed=0, monitored=True):
+    """Same parameters and result as models.ticket_office.run: an M/M/c
+    ticket office given by MEAN_INTER_ARRIVAL_TIME, MEAN_SERVICE_TIME and
+    capacity, run until SIMULATION_END_TIME.  The random numbers come from
+    NumPy, so single runs differ from the SimPy model but have the same
+    distribution.  With monitored=False no Monitor is built and the
+    arrival, start and departure times are returned instead.
+    """
+    from models.common import with_defaults
+    from models.ticket_office import DEFAULTS
+    p = with_defaults(DEFAULTS, params)
+    rng = np.random.default_rng(seed)
+    end = p['SIMULATION_END_TIME']
+    arrivals = poisson_arrivals(rng, 1/p['MEAN_INTER_ARRIVAL_TIME'], 0, end)
+    services = rng.exponential(p['MEAN_SERVICE_TIME'], arrivals.size)
+    if not monitored:
+        starts = fifo_starts(arrivals, services, p['capacity'])
+        return arrivals, starts, starts + services
+    return attach_station(Monitor(), 'office', arrivals, services, p['capacity'], 0, end)
+
+
+if __name__ == "__main__":
+    import time
+    import simpy
+    from models import ticket_office
+    from models.common import make_server
+    from analytic import mmc
+
+    # the same arrival and service times through SimPy and the fast path
+    def passenger(env, office, service, monitor):
+        t_arrival = env.now
+        with office.request() as request:
+            yield request
+            t_queue = env.now - t_arrival
+            yield env.timeout(service)
+        monitor.entity_logger('office', None, { 't_queue': t_queue, 't_response': env.now - t_arrival })
+
+    def passenger_generator(env, office, arrivals, services, monitor):
+        for a, s in zip(arrivals.tolist(), services.tolist()):
+            yield env.timeout(a - env.now)
+            env.process(passenger(env, office, s, monitor))
+
+    rng = np.random.default_rng(1)
+    for capacity in (1, 3):
+        end = 20000
+        arrivals = poisson_arrivals(rng, 0.9 * capacity / 8, 0, end)
+        services = rng.exponential(8, arrivals.size)
+        env = simpy.Environment()
+        m = Monitor()
+        office = make_server(env, m, 'office', capacity)
+        env.process(passenger_generator(env, office, arrivals, services, m))
+        env.run(until=end)
+        fast = attach_station(Monitor(), 'office', arrivals, services, capacity, 0, end)
+        begins = np.arange(0, end, 100.0)
+        a = m.get_stats_many('office', begins, begins + 100)['stats']
+        b = fast.get_stats_many('office', begins, begins + 100)['stats']
+        ea, eb = m.get_entity_stats('office'), fast.get_entity_stats('office')
+        print('c={} max diff util {:.2e} queue {:.2e} t_response {:.2e} ({} entities)'.format(
+            capacity, np.abs(a['util'] - b['util']).max(), np.abs(a['queue'] - b['queue']).max(),
+            np.abs(ea.samples('t_response') - eb.samples('t_response')).max(), len(eb)))
+
+    params = { 'MEAN_INTER_ARRIVAL_TIME': 10, 'MEAN_SERVICE_TIME': 8, 'SIMULATION_END_TIME': 200000 }
+    t = time.perf_counter()
+    simpy_summary = ticket_office.run(params, 1).get_summary('office')
+    t_simpy = time.perf_counter() - t
+    t = time.perf_counter()
+    fast = run(params, 1)
+    t_fast = time.perf_counter() - t
+    print('simpy {:.3f}s fast {:.3f}s ({:.0f}x)'.format(t_simpy, t_fast, t_simpy / t_fast))
+    print(simpy_summary['stats'], fast.get_summary('office')['stats'], mmc(1/10, 1/8)['Lq'])
+    params['SIMULATION_END_TIME'] = 10000000
+    t = time.perf_counter()
+    fast = run(params, 2)
+    print('{} customers in {:.2f}s'.format(len(fast.get_entity_stats('office')), time.perf_counter() - t),
+          fast.get_summary('office')['stats'], fast.get_entity_stats('office').mean('t_queue'), mmc(1/10, 1/8)['Wq'])
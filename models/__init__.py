@@ -0,0 +1,29 @@
+# Simpy Example - Headless, importable versions of the tutorial models
+# for 2110636 Performance Evaluation and Analysis Class
+# Natawut Nupairoj, Chulalongkorn University, Thailand
+#
+# Each module matches one tutorial script, does no work when imported and
+# provides:
+#   DEFAULTS                  the constants of the script
+#   utilization(params)       utilization of the busiest station
+#   build_model(params, env=None, monitor=None)
+#   run(params=None, seed=0, monitored=True)
+# run(params, seed) returns the Monitor, so it can be given directly to
+# run_replications (through functools.partial) or run_sweep.
+import importlib
+
+MODELS = {
+    '3-resource': 'ticket_office',
+    '4-queueing network': 'queueing_network',
+    '5-complex queueing network': 'complex_network',
+    '6-separated queues': 'separated_queues',
+    '7-balking and reneging': 'balking',
+    '9-store and event': 'store_and_event',
+}
+
+
+def get_model(name):
+    """The model module for a tutorial script name or a module name, only
+    imported when asked for.
+    """
+    return importlib.import_module('models.' + MODELS.get(name, name))
@@ -0,0 +1,55 @@
+# Simpy Example - 7-balking and reneging: passengers do not join a full
+# queue and leave after waiting too long, with an ImpatientResource
+# keeping the queue limit, the deadlines and the balk/renege counts
+# for 2110636 Performance Evaluation and Analysis Class
+# Natawut Nupairoj, Chulalongkorn University, Thailand
+import random
+import simpy
+from impatient import ImpatientResource
+from models.common import with_defaults, generate, log_entity, run_model
+
+DEFAULTS = {
+    'MEAN_INTER_ARRIVAL_TIME': 5,
+    'MEAN_SERVICE_TIME': 8,
+    'WAIT_LIMIT': 6,
+    'QUEUE_LIMIT': 2,
+    'SIMULATION_END_TIME': 20000,
+}
+
+
+def utilization(params):
+    # offered load: what the office would carry without balking or reneging
+    p = with_defaults(DEFAULTS, params)
+    return p['MEAN_SERVICE_TIME'] / p['MEAN_INTER_ARRIVAL_TIME']
+
+
+def passenger(env, office, p, monitor):
+    t_arrival = env.now
+    with office.request(patience=p['WAIT_LIMIT']) as request:
+        if request.balked:
+            # queue is full --> balking
+            return
+        yield request
+        if request.reneged:
+            # waiting for too long --> reneging
+            return
+        t_queue = env.now - t_arrival
+        yield env.timeout(random.expovariate(1/p['MEAN_SERVICE_TIME']))
+        log_entity(monitor, 'office', { 't_queue': t_queue, 't_response': env.now - t_arrival })
+
+
+def build_model(params=None, env=None, monitor=None):
+    p = with_defaults(DEFAULTS, params)
+    env = env or simpy.Environment()
+    # the counts and waits of balking and reneging passengers are kept by
+    # the resource: monitor.get_resource('office')['resource'].get_counts()
+    office = ImpatientResource(env, 1, p['QUEUE_LIMIT'])
+    office.name = 'office'
+    if monitor is not None:
+        monitor.register('office', office, 1)
+    env.process(generate(env, 1/p['MEAN_INTER_ARRIVAL_TIME'], passenger, office, p, monitor))
+    return env
+
+
+def run(params=None, seed=0, monitored=True):
+    return run_model(build_model, DEFAULTS, params, seed, monitored)
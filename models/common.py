@@ -0,0 +1,71 @@
+# Simpy Example - Building blocks shared by the model modules
+# for 2110636 Performance Evaluation and Analysis Class
+# Natawut Nupairoj, Chulalongkorn University, Thailand
+import random
+import simpy
+from resource_monitor import Monitor, MonitoredResource
+
+
+def with_defaults(defaults, params):
+    p = dict(defaults)
+    if params:
+        p.update(params)
+    return p
+
+
+def make_server(env, monitor, name, capacity):
+    """simpy.Resource, or a MonitoredResource registered as *name* when
+    there is a Monitor.
+    """
+    if monitor is None:
+        server = simpy.Resource(env, capacity=capacity)
+    else:
+        server = MonitoredResource(env, capacity=capacity)
+        monitor.register(name, server, capacity)
+    server.name = name
+    return server
+
+
+def serve(env, server, mean_service_time, extra=0):
+    # wait for the server, hold it for an exponential service time and
+    # return the time spent in the queue
+    t_arrival = env.now
+    with server.request() as request:
+        yield request
+        t_queue = env.now - t_arrival
+        yield env.timeout(random.expovariate(1/mean_service_time) + extra)
+    return t_queue
+
+
+def generate(env, arrival_rate, passenger, *args):
+    while True:
+        env.process(passenger(env, *args))
+        yield env.timeout(random.expovariate(arrival_rate))
+
+
+def log_entity(monitor, name, stats):
+    if monitor is not None:
+        monitor.entity_logger(name, None, stats)
+
+
+def params_for_load(model, rho, params=None):
+    """*params* with MEAN_INTER_ARRIVAL_TIME set so that the busiest
+    station of *model* runs at utilization *rho*.
+    """
+    p = with_defaults(model.DEFAULTS, params)
+    p['MEAN_INTER_ARRIVAL_TIME'] = 1
+    p['MEAN_INTER_ARRIVAL_TIME'] = model.utilization(p) / rho
+    return p
+
+
+def run_model(build_model, defaults, params=None, seed=0, monitored=True):
+    """Run a model once from a fresh environment and return its Monitor,
+    or the environment when monitored=False.
+    """
+    random.seed(seed)
+    p = with_defaults(defaults, params)
+    env = simpy.Environment()
+    monitor = Monitor() if monitored else None
+    build_model(p, env, monitor)
+    env.run(until=p['SIMULATION_END_TIME'])
+    return monitor if monitored else env
@@ -0,0 +1,59 @@
+# Simpy Example - 5-complex queueing network: 80% ticket machine, 20% ticket
+# office, then the gate
+# for 2110636 Performance Evaluation and Analysis Class
+# Natawut Nupairoj, Chulalongkorn University, Thailand
+import random
+import simpy
+from models.common import with_defaults, make_server, serve, generate, log_entity, run_model
+
+DEFAULTS = {
+    'MEAN_INTER_ARRIVAL_TIME': 10,
+    'TO_MEAN_SERVICE_TIME': 20,
+    'TM_MEAN_SERVICE_TIME': 15,
+    'GA_MEAN_SERVICE_TIME': 10,
+    'MACHINE_SHARE': 0.8,
+    'SERVICE_TIME_OFFSET': 0,
+    'SIMULATION_END_TIME': 20000,
+}
+
+
+def utilization(params):
+    p = with_defaults(DEFAULTS, params)
+    share = p['MACHINE_SHARE']
+    extra = p['SERVICE_TIME_OFFSET']
+    return max(share * (p['TM_MEAN_SERVICE_TIME'] + extra) / 2,
+               (1 - share) * (p['TO_MEAN_SERVICE_TIME'] + extra),
+               p['GA_MEAN_SERVICE_TIME'] + extra) / p['MEAN_INTER_ARRIVAL_TIME']
+
+
+def build_stations(env, monitor):
+    ticket_machine = make_server(env, monitor, 'ticket_machine', 2)
+    ticket_office = make_server(env, monitor, 'ticket_office', 1)
+    gate = make_server(env, monitor, 'gate', 1)
+    return ticket_machine, ticket_office, gate
+
+
+def buy_and_pass(env, ticket_machine, ticket_office, gate, p, monitor):
+    # buy a ticket at a machine or at the office, then pass the gate
+    t_arrival = env.now
+    extra = p['SERVICE_TIME_OFFSET']
+    if random.random() < p['MACHINE_SHARE']:
+        t_queue = yield from serve(env, ticket_machine, p['TM_MEAN_SERVICE_TIME'], extra)
+        log_entity(monitor, 'ticket_machine', { 't_queue': t_queue })
+    else:
+        t_queue = yield from serve(env, ticket_office, p['TO_MEAN_SERVICE_TIME'], extra)
+        log_entity(monitor, 'ticket_office', { 't_queue': t_queue })
+    t_queue = yield from serve(env, gate, p['GA_MEAN_SERVICE_TIME'], extra)
+    log_entity(monitor, 'gate', { 't_queue': t_queue, 't_response': env.now - t_arrival })
+
+
+def build_model(params=None, env=None, monitor=None):
+    p = with_defaults(DEFAULTS, params)
+    env = env or simpy.Environment()
+    stations = build_stations(env, monitor)
+    env.process(generate(env, 1/p['MEAN_INTER_ARRIVAL_TIME'], buy_and_pass, *stations, p, monitor))
+    return env
+
+
+def run(params=None, seed=0, monitored=True):
+    return run_model(build_model, DEFAULTS, params, seed, monitored)
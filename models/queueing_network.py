@@ -0,0 +1,38 @@
+# Simpy Example - 4-queueing network: ticket office then gate
+# for 2110636 Performance Evaluation and Analysis Class
+# Natawut Nupairoj, Chulalongkorn University, Thailand
+import simpy
+from models.common import with_defaults, make_server, serve, generate, log_entity, run_model
+
+DEFAULTS = {
+    'MEAN_INTER_ARRIVAL_TIME': 10,
+    'TO_MEAN_SERVICE_TIME': 8,
+    'GA_MEAN_SERVICE_TIME': 8,
+    'SIMULATION_END_TIME': 20000,
+}
+
+
+def utilization(params):
+    p = with_defaults(DEFAULTS, params)
+    return max(p['TO_MEAN_SERVICE_TIME'], p['GA_MEAN_SERVICE_TIME']) / p['MEAN_INTER_ARRIVAL_TIME']
+
+
+def passenger(env, ticket_office, gate, p, monitor):
+    t_arrival = env.now
+    t_queue = yield from serve(env, ticket_office, p['TO_MEAN_SERVICE_TIME'])
+    log_entity(monitor, 'ticket_office', { 't_queue': t_queue })
+    t_queue = yield from serve(env, gate, p['GA_MEAN_SERVICE_TIME'])
+    log_entity(monitor, 'gate', { 't_queue': t_queue, 't_response': env.now - t_arrival })
+
+
+def build_model(params=None, env=None, monitor=None):
+    p = with_defaults(DEFAULTS, params)
+    env = env or simpy.Environment()
+    ticket_office = make_server(env, monitor, 'ticket_office', 1)
+    gate = make_server(env, monitor, 'gate', 1)
+    env.process(generate(env, 1/p['MEAN_INTER_ARRIVAL_TIME'], passenger, ticket_office, gate, p, monitor))
+    return env
+
+
+def run(params=None, seed=0, monitored=True):
+    return run_model(build_model, DEFAULTS, params, seed, monitored)
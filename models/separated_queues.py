@@ -0,0 +1,46 @@
+# Simpy Example - 6-separated queues: a Dispatcher sends each passenger to
+# an office, by default the one with the fewest passengers
+# for 2110636 Performance Evaluation and Analysis Class
+# Natawut Nupairoj, Chulalongkorn University, Thailand
+import random
+import simpy
+from dispatcher import Dispatcher
+from models.common import with_defaults, make_server, generate, log_entity, run_model
+
+DEFAULTS = {
+    'MEAN_INTER_ARRIVAL_TIME': 5,
+    'MEAN_SERVICE_TIME': 8,
+    'n_offices': 2,
+    'policy': 'jsq',
+    'SIMULATION_END_TIME': 20000,
+}
+
+
+def utilization(params):
+    p = with_defaults(DEFAULTS, params)
+    return p['MEAN_SERVICE_TIME'] / (p['MEAN_INTER_ARRIVAL_TIME'] * p['n_offices'])
+
+
+def passenger(env, dispatcher, mean_service_time, monitor):
+    t_arrival = env.now
+    # the service time is drawn on arrival, the 'least_work' policy needs it
+    service_time = random.expovariate(1/mean_service_time)
+    office, n = dispatcher.dispatch(service_time)
+    with office.request() as request:
+        yield request
+        t_queue = env.now - t_arrival
+        yield env.timeout(service_time)
+    log_entity(monitor, office.name, { 't_queue': t_queue, 't_response': env.now - t_arrival })
+
+
+def build_model(params=None, env=None, monitor=None):
+    p = with_defaults(DEFAULTS, params)
+    env = env or simpy.Environment()
+    offices = [make_server(env, monitor, 'office-{}'.format(i + 1), 1) for i in range(p['n_offices'])]
+    dispatcher = Dispatcher(env, offices, p['policy'])
+    env.process(generate(env, 1/p['MEAN_INTER_ARRIVAL_TIME'], passenger, dispatcher, p['MEAN_SERVICE_TIME'], monitor))
+    return env
+
+
+def run(params=None, seed=0, monitored=True):
+    return run_model(build_model, DEFAULTS, params, seed, monitored)
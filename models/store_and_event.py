@@ -0,0 +1,68 @@
+# Simpy Example - 9-store and event: the complex network, then passengers
+# wait on the platform for a train with a random number of free seats
+# for 2110636 Performance Evaluation and Analysis Class
+# Natawut Nupairoj, Chulalongkorn University, Thailand
+import random
+import simpy
+from batch_store import BatchStore
+from models import complex_network
+from models.common import with_defaults, generate, run_model
+
+DEFAULTS = {
+    'MEAN_INTER_ARRIVAL_TIME': 5,
+    'TO_MEAN_SERVICE_TIME': 20,
+    'TM_MEAN_SERVICE_TIME': 10,
+    'GA_MEAN_SERVICE_TIME': 5,
+    'MACHINE_SHARE': 0.8,
+    'SERVICE_TIME_OFFSET': 0.1,
+    'TRAIN_INTERVAL': 20,
+    'TRAIN_CAPACITY': 5,
+    'PLATFORM_CAPACITY': 1000,
+    'SIMULATION_END_TIME': 20000,
+}
+
+
+def utilization(params):
+    return complex_network.utilization(with_defaults(DEFAULTS, params))
+
+
+def passenger(env, ticket_machine, ticket_office, gate, platform, p, monitor):
+    yield from complex_network.buy_and_pass(env, ticket_machine, ticket_office, gate, p, monitor)
+    # register to wait for a train on the platform
+    train_arrival_event = env.event()
+    yield platform.put(train_arrival_event)
+    yield train_arrival_event
+
+
+def train(env, remaining, platform):
+    # board the waiting passengers up to the free seats in one get
+    passengers = yield platform.get_batch(remaining, min_items=0)
+    for passenger_ev in passengers:
+        # inform the passenger to board the train
+        passenger_ev.succeed()
+    yield env.timeout(0.1)
+
+
+def train_generator(env, duration, capacity, platform):
+    while True:
+        yield env.timeout(duration)
+        # random remaining capacity
+        env.process(train(env, random.randint(0, capacity), platform))
+
+
+def build_model(params=None, env=None, monitor=None):
+    p = with_defaults(DEFAULTS, params)
+    env = env or simpy.Environment()
+    stations = complex_network.build_stations(env, monitor)
+    # the sizes of the boarding batches are kept by the platform:
+    # monitor.get_resource('platform')['resource'].batches
+    platform = BatchStore(env, capacity=p['PLATFORM_CAPACITY'])
+    if monitor is not None:
+        monitor.register('platform', platform, p['PLATFORM_CAPACITY'])
+    env.process(generate(env, 1/p['MEAN_INTER_ARRIVAL_TIME'], passenger, *stations, platform, p, monitor))
+    env.process(train_generator(env, p['TRAIN_INTERVAL'], p['TRAIN_CAPACITY'], platform))
+    return env
+
+
+def run(params=None, seed=0, monitored=True):
+    return run_model(build_model, DEFAULTS, params, seed, monitored)
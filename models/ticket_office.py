@@ -0,0 +1,35 @@
+# Simpy Example - 3-resource: one ticket office
+# for 2110636 Performance Evaluation and Analysis Class
+# Natawut Nupairoj, Chulalongkorn University, Thailand
+import simpy
+from models.common import with_defaults, make_server, serve, generate, log_entity, run_model
+
+DEFAULTS = {
+    'MEAN_INTER_ARRIVAL_TIME': 2,
+    'MEAN_SERVICE_TIME': 4,
+    'capacity': 1,
+    'SIMULATION_END_TIME': 20000,
+}
+
+
+def utilization(params):
+    p = with_defaults(DEFAULTS, params)
+    return p['MEAN_SERVICE_TIME'] / (p['MEAN_INTER_ARRIVAL_TIME'] * p['capacity'])
+
+
+def passenger(env, office, mean_service_time, monitor):
+    t_arrival = env.now
+    t_queue = yield from serve(env, office, mean_service_time)
+    log_entity(monitor, 'office', { 't_queue': t_queue, 't_response': env.now - t_arrival })
+
+
+def build_model(params=None, env=None, monitor=None):
+    p = with_defaults(DEFAULTS, params)
+    env = env or simpy.Environment()
+    office = make_server(env, monitor, 'office', p['capacity'])
+    env.process(generate(env, 1/p['MEAN_INTER_ARRIVAL_TIME'], passenger, office, p['MEAN_SERVICE_TIME'], monitor))
+    return env
+
+
+def run(params=None, seed=0, monitored=True):
+    return run_model(build_model, DEFAULTS, params, seed, monitored)
@@ -0,0 +1,169 @@
+#!/usr/bin/env python
+#
+# Simpy Example - Parallel replications of a model(seed) function
+# for 2110636 Performance Evaluation and Analysis Class
+# Natawut Nupairoj, Chulalongkorn University, Thailand
+import itertools
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+import numpy as np
+import scipy.stats as st
+
+
+def summarize_monitor(monitor):
+    """Reduce a Monitor to a small dict that is cheap to send back from a
+    worker: whole-run util/queue per resource and the mean of each entity
+    statistic.
+    """
+    summary = {}
+    for name in monitor.get_names():
+        s = monitor.get_summary(name)['stats']
+        entity = monitor.get_entity_stats(name)
+        e_stats = { 'count': len(entity) }
+        for key in entity.get_metrics():
+            e_stats[key] = entity.mean(key)
+        summary[name] = { 'util': s['util'], 'queue': s['queue'], 'entity': e_stats }
+    return summary
+
+
+def replicate(model, summarize, seed):
+    # each replication owns its random stream, whichever worker runs it
+    random.seed(seed)
+    result = model(seed)
+    if summarize is not None:
+        result = summarize(result)
+    return result
+
+
+def run_replications(model, seeds, summarize=summarize_monitor, workers=None):
+    """Run model(seed) for every seed on a pool of *workers* processes and
+    return the summaries in the same order as *seeds*.  *model* and
+    *summarize* must be picklable (module level functions).  With
+    workers=1 the runs are done in this process.
+    """
+    job = partial(replicate, model, summarize)
+    if workers == 1:
+        return [job(seed) for seed in seeds]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(job, seeds))
+
+
+def confidence_interval(data, alpha=0.95):
+    """t-based confidence interval of the mean of *data*, returned as
+    (mean, low, high).
+    """
+    data = np.asarray(data, dtype=float)
+    mean = data.mean()
+    sem = st.sem(data) if data.size > 1 else 0
+    if sem != 0:
+        (low, high) = st.t.interval(alpha, data.size-1, loc=mean, scale=sem)
+    else:
+        (low, high) = (mean, mean)
+    return float(mean), float(low), float(high)
+
+
+def get_metric(summary, metric):
+    # a metric is either a callable or a dotted path into the summary,
+    # e.g. 'office.util' or 'office.entity.t_response'
+    if callable(metric):
+        return metric(summary)
+    value = summary
+    for key in metric.split('.'):
+        value = value[key]
+    return value
+
+
+def run_until_precision(model, metrics, rel_width=0.05, alpha=0.95, seeds=None, min_runs=5, max_runs=500,
+                        summarize=summarize_monitor, workers=None):
+    """Keep launching replications until the confidence interval of every
+    metric has a relative half-width (half-width / mean) of at most
+    *rel_width*, or *max_runs* runs are done.  Runs are launched one batch
+    of *workers* at a time, and take their seeds from *seeds* (1, 2, 3, ...
+    by default).
+    """
+    if seeds is None:
+        seeds = itertools.count(1)
+    seeds = iter(seeds)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    job = partial(replicate, model, summarize)
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+
+    summaries = []
+    stats = {}
+    converged = False
+    try:
+        while len(summaries) < max_runs:
+            n_batch = min(max(workers, min_runs - len(summaries)), max_runs - len(summaries))
+            batch = list(itertools.islice(seeds, n_batch))
+            if not batch:
+                break
+            if executor is None:
+                summaries.extend(job(seed) for seed in batch)
+            else:
+                summaries.extend(executor.map(job, batch))
+            if len(summaries) < min_runs:
+                continue
+
+            converged = True
+            for metric in metrics:
+                mean, low, high = confidence_interval([get_metric(s, metric) for s in summaries], alpha)
+                half_width = (high - low) / 2
+                width_pct = half_width / abs(mean) if mean != 0 else 0
+                stats[metric] = { 'mean': mean, 'low': low, 'high': high, 'rel_width': width_pct }
+                if width_pct > rel_width:
+                    converged = False
+            if converged:
+                break
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    return { 'runs': len(summaries), 'converged': converged, 'stats': stats, 'summaries': summaries }
+
+
+def compare_scenarios(model_a, model_b, seeds, metrics, alpha=0.95, antithetic=False,
+                      summarize=summarize_monitor, workers=None):
+    """Compare two scenarios run with the same seeds and report a
+    paired-difference confidence interval (a - b) for every metric.  The
+    models take (seed, antithetic=False) and should draw their variates
+    from StreamSet(seed, antithetic) so that both scenarios see common
+    random numbers.  With antithetic=True every seed is also run with the
+    antithetic streams and each pair is averaged into one observation.
+    """
+    seeds = list(seeds)
+    runs_a = run_replications(partial(model_a, antithetic=False), seeds, summarize, workers)
+    runs_b = run_replications(partial(model_b, antithetic=False), seeds, summarize, workers)
+    if antithetic:
+        anti_a = run_replications(partial(model_a, antithetic=True), seeds, summarize, workers)
+        anti_b = run_replications(partial(model_b, antithetic=True), seeds, summarize, workers)
+
+    r = { 'runs': len(seeds), 'stats': {} }
+    for metric in metrics:
+        a = np.array([get_metric(s, metric) for s in runs_a])
+        b = np.array([get_metric(s, metric) for s in runs_b])
+        if antithetic:
+            a = (a + np.array([get_metric(s, metric) for s in anti_a])) / 2
+            b = (b + np.array([get_metric(s, metric) for s in anti_b])) / 2
+        mean, low, high = confidence_interval(a - b, alpha)
+        r['stats'][metric] = { 'mean_a': float(a.mean()), 'mean_b': float(b.mean()),
+                               'diff': { 'mean': mean, 'low': low, 'high': high } }
+    return r
+
+
+if __name__ == "__main__":
+    from models import ticket_office
+
+    # the model must be importable by the worker processes, whatever the
+    # start method, so it is a module level function and not one defined here
+    params = { 'MEAN_INTER_ARRIVAL_TIME': 10, 'MEAN_SERVICE_TIME': 4, 'SIMULATION_END_TIME': 50000 }
+    model = partial(ticket_office.run, params)
+
+    seeds = list(range(1, 21))
+    for seed, r in zip(seeds, run_replications(model, seeds)):
+        print(seed, r['office'])
+
+    r = run_until_precision(model, ['office.util', 'office.entity.t_response'], rel_width=0.01)
+    print(r['runs'], r['converged'], r['stats'])
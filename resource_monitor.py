@@ -3,9 +3,14 @@
 # Simpy Example - Generic resource monitor
 # for 2110636 Performance Evaluation and Analysis Class
 # Natawut Nupairoj, Chulalongkorn University, Thailand
+from array import array
+from bisect import bisect_right
+from collections import deque
 from functools import partial, wraps
+import numpy as np
 import simpy
 from simpy.util import start_delayed
+from entity_stats import EntityStats
 
 
 def patch_resource(resource, func_name, pre=None, post=None):
@@ -37,104 +42,397 @@ def patch_resource(resource, func_name, pre=None, post=None):
         setattr(resource, func_name, get_wrapper(getattr(resource, func_name)))
 
 
+def unpatch_resource(resource, func_name):
+    """Remove the wrapper installed by patch_resource."""
+    if func_name in resource.__dict__:
+        delattr(resource, func_name)
+
+
+class MonitoredResource(simpy.Resource):
+    """simpy.Resource that records its state only when the number of users
+    or the queue length has actually changed.  The checks run in SimPy's
+    trigger callbacks, so there is no wrapper around request/release.
+    Changes are appended to the columnar *log* when one is attached, and
+    passed to *logger* as logger(clock, count, queue) when one is set.
+    """
+    def __init__(self, env, capacity=1):
+        super().__init__(env, capacity)
+        self.log = None
+        self.logger = None
+        self._count = 0
+        self._queue = 0
+
+    def _trigger_put(self, get_event):
+        simpy.Resource._trigger_put(self, get_event)
+        count = len(self.users)
+        queue = len(self.put_queue)
+        if count != self._count or queue != self._queue:
+            self._changed(count, queue)
+
+    def _trigger_get(self, put_event):
+        simpy.Resource._trigger_get(self, put_event)
+        count = len(self.users)
+        queue = len(self.put_queue)
+        if count != self._count or queue != self._queue:
+            self._changed(count, queue)
+
+    def _changed(self, count, queue):
+        self._count = count
+        self._queue = queue
+        now = self._env._now
+        log = self.log
+        if log is not None:
+            # one record per clock: a change at the same clock replaces the
+            # previous record, so the log is already clean
+            clocks = log['clock']
+            if clocks and clocks[-1] == now:
+                log['count'][-1] = count
+                log['queue'][-1] = queue
+            else:
+                clocks.append(now)
+                log['count'].append(count)
+                log['queue'].append(queue)
+        if self.logger is not None:
+            self.logger(now, count, queue)
+
+
+# op codes used by the columnar resource logs
+FUNC_CODES = {'request': 0, 'release': 1}
+STEP_CODES = {'pre': 0, 'post': 1}
+
+
+def new_resource_log():
+    """Create an empty columnar log.  Each column is a growable array, so a
+    record costs a few bytes instead of a few nested dicts.
+    """
+    return {
+        'clock': array('d'),
+        'func': array('b'),
+        'step': array('b'),
+        'count': array('i'),
+        'queue': array('i')
+    }
+
+
+def new_stream_stats(begin, capacity, window=None, n_windows=1000):
+    """Create the accumulators for a resource monitored in stream mode.  Only
+    the time-weighted areas are kept, plus the last *n_windows* aggregates of
+    length *window* when a window is given.
+    """
+    return {
+        'capacity': capacity,
+        'begin': begin,
+        'last_t': begin,
+        'area_b': 0.0,
+        'area_q': 0.0,
+        'window': window,
+        'w_begin': begin,
+        'w_area_b': 0.0,
+        'w_area_q': 0.0,
+        'windows': deque(maxlen=n_windows)
+    }
+
+
 class Monitor:
-    _resources = dict()
+    def __init__(self, max_runs=10, quantiles=(0.5, 0.9, 0.99), keep_samples=True):
+        # each Monitor owns its data; registering a name again closes the
+        # previous run and keeps at most max_runs of them in the history
+        self.max_runs = max_runs
+        self.quantiles = quantiles
+        self.keep_samples = keep_samples
+        self._resources = dict()
+        self._history = dict()
 
-    def register(self, name, resource, capacity):
-        data = []
-        resource_logger = partial(Monitor.resource_logger, data)
-        patch_resource(resource, 'request', pre=resource_logger, post=resource_logger)
-        patch_resource(resource, 'release', pre=resource_logger, post=resource_logger)
+    def register(self, name, resource, capacity, stream=False, window=None, n_windows=1000):
+        if name in self._resources:
+            if name not in self._history:
+                self._history[name] = deque(maxlen=self.max_runs)
+            self._history[name].append(self.close(name))
         r = {
-            'resource': resource,
             'capacity': capacity,
-            'logs': data,
-            'entity': []
+            'begin': resource._env.now,
+            'entity': EntityStats(self.quantiles, self.keep_samples)
         }
+        if hasattr(resource, '_changed'):
+            # state changes come from the resource itself (a MonitoredResource
+            # or anything with the same records, like batch_store.BatchStore)
+            r['changes'] = True
+        if stream:
+            r['stream'] = new_stream_stats(resource._env.now, capacity, window, n_windows)
+        elif r.get('changes'):
+            r['logs'] = { 'clock': array('d'), 'count': array('i'), 'queue': array('i') }
+        else:
+            r['logs'] = new_resource_log()
         self._resources[name] = r
+        self._attach(r, resource)
+
+    def _attach(self, r, resource):
+        r['resource'] = resource
+        if r.get('changes'):
+            if 'stream' in r:
+                resource.logger = partial(Monitor.change_stream_logger, r['stream'])
+            else:
+                resource.log = r['logs']
+            # start with the current state
+            resource._changed(resource.count, len(resource.queue))
+        else:
+            if 'stream' in r:
+                resource_logger = partial(Monitor.stream_logger, r['stream'])
+            else:
+                resource_logger = partial(Monitor.resource_logger, r['logs'])
+            patch_resource(resource, 'request', pre=resource_logger, post=resource_logger)
+            patch_resource(resource, 'release', pre=resource_logger, post=resource_logger)
+
+    def rebind(self, name, resource):
+        """Continue monitoring *name* on another resource of the same kind,
+        e.g. the one rebuilt when a checkpoint is restored.
+        """
+        r = self._resources[name]
+        # drop the results saved when it was pickled, they end at that time
+        for key in ('summary', 'windows', 'end'):
+            r.pop(key, None)
+        self._attach(r, resource)
+
+    def __getstate__(self):
+        # resources belong to an environment and cannot be pickled.  A live
+        # resource keeps its logs, so that rebind can carry on with them,
+        # plus its summary (and windows) up to now, which get_summary and
+        # get_windows answer until it is rebound
+        state = dict(self.__dict__)
+        resources = {}
+        for name, r in self._resources.items():
+            r_state = dict((k, v) for k, v in r.items() if k != 'resource')
+            if not r.get('closed') and not r.get('drained') and 'resource' in r:
+                r_state['summary'] = self.get_summary(name)
+                r_state['end'] = r_state['summary']['end']
+                if 'stream' in r:
+                    r_state['windows'] = self.get_windows(name)
+            resources[name] = r_state
+        state['_resources'] = resources
+        return state
 
     def get_resource(self, name):
         return self._resources[name]
 
+    def get_names(self):
+        return list(self._resources)
+
+    def get_history(self, name):
+        """Exports of the earlier runs registered under *name*, oldest first."""
+        return list(self._history.get(name, []))
+
+    def export(self, name):
+        """Compact copy of a resource's results: the summary, the cleaned
+        stats (or the windows in stream mode) and the entity records.
+        """
+        r = self._resources[name]
+        e = { 'name': name, 'capacity': r['capacity'], 'begin': r['begin'],
+              'summary': self.get_summary(name), 'entity': r['entity'] }
+        if 'stats' in r or 'logs' in r:
+            e['stats'] = self._clean_stats(name)
+        else:
+            e['windows'] = self.get_windows(name)
+        return e
+
+    def attach(self, name, export):
+        """Add a closed resource from an export, e.g. one loaded from disk."""
+        export['closed'] = True
+        self._resources[name] = export
+
+    def close(self, name=None):
+        """Detach from the resource and free the raw logs, keeping only the
+        export, which get_stats/get_summary keep using.  Closes every
+        resource when *name* is None.
+        """
+        if name is None:
+            return [self.close(n) for n in self.get_names()]
+        r = self._resources[name]
+        if r.get('closed'):
+            return r
+        e = self.export(name)
+        resource = r.get('resource')
+        if resource is None:
+            # unpickled and never rebound, nothing to detach
+            pass
+        elif r.get('changes'):
+            resource.log = None
+            resource.logger = None
+        else:
+            unpatch_resource(resource, 'request')
+            unpatch_resource(resource, 'release')
+        e['end'] = e['summary']['end']
+        e['closed'] = True
+        self._resources[name] = e
+        return e
+
     def entity_logger(self, name, e_name, stats):
-        e = { 'name': e_name, 'stats': stats }
-        self._resources[name]['entity'].append(e)
+        self._resources[name]['entity'].add(stats)
+
+    def get_entity_stats(self, name):
+        return self._resources[name]['entity']
 
     @staticmethod
     def resource_logger(data, func_name, step, resource):
-        d = { 'clock': resource._env.now, 'func': func_name, 'step': step,
-              'stats': { 'count': resource.count, 'queue': len(resource.queue) } }
-        data.append(d)
+        data['clock'].append(resource._env.now)
+        data['func'].append(FUNC_CODES[func_name])
+        data['step'].append(STEP_CODES[step])
+        data['count'].append(resource.count)
+        data['queue'].append(len(resource.queue))
+
+    @staticmethod
+    def change_stream_logger(data, clock, count, queue):
+        # the previous state holds until this change
+        if clock > data['last_t']:
+            Monitor.advance(data, clock, data['b'], data['q'])
+        data['b'] = count
+        data['q'] = queue
+
+    @staticmethod
+    def stream_logger(data, func_name, step, resource):
+        # same rule as cleanup: the first record of a new clock holds the
+        # stats for the time since the previous clock
+        now = resource._env.now
+        if now > data['last_t']:
+            Monitor.advance(data, now, resource.count, len(resource.queue))
+
+    @staticmethod
+    def advance(data, now, b, q):
+        # integrate the state b/q up to now, closing every window that ends
+        # on the way
+        window = data['window']
+        if window:
+            w_end = data['w_begin'] + window
+            while w_end <= now:
+                delta_t = w_end - data['last_t']
+                data['area_b'] += b * delta_t
+                data['area_q'] += q * delta_t
+                w_area_b = data['w_area_b'] + b * delta_t
+                w_area_q = data['w_area_q'] + q * delta_t
+                o = { 'begin': data['w_begin'], 'end': w_end,
+                      'stats': { 'util': w_area_b / (window * data['capacity']), 'queue': w_area_q / window } }
+                data['windows'].append(o)
+                data['last_t'] = w_end
+                data['w_begin'] = w_end
+                data['w_area_b'] = 0.0
+                data['w_area_q'] = 0.0
+                w_end += window
+        delta_t = now - data['last_t']
+        data['area_b'] += b * delta_t
+        data['area_q'] += q * delta_t
+        if window:
+            data['w_area_b'] += b * delta_t
+            data['w_area_q'] += q * delta_t
+        data['last_t'] = now
 
     @staticmethod
     def cleanup(data):
         # we will need to clean up the data such that
         # the stats of the current clock will come from the next clock
         # and for the last clock will use the final data
-        clean_data = []
+        clean_data = {
+            'clock': array('d'),
+            'count': array('i'),
+            'queue': array('i')
+        }
+        clocks = data['clock']
+        counts = data['count']
+        queues = data['queue']
         cur_clock = -1
-        for d in data:
-            clock = d['clock']
+        for i in range(len(clocks)):
+            clock = clocks[i]
             if cur_clock == -1:
                 cur_clock = clock
                 continue
 
             if cur_clock < clock:
                 # change to the next one, we will use this stats for the previous clock
-                o = { 'clock': cur_clock, 'stats': d['stats'] }
-                clean_data.append(o)
+                clean_data['clock'].append(cur_clock)
+                clean_data['count'].append(counts[i])
+                clean_data['queue'].append(queues[i])
                 cur_clock = clock
 
         # handle the last clock
-        d = data[-1]
-        o = {'clock': d['clock'], 'stats': d['stats']}
-        clean_data.append(o)
+        clean_data['clock'].append(clocks[-1])
+        clean_data['count'].append(counts[-1])
+        clean_data['queue'].append(queues[-1])
+        return Monitor.build_index(clean_data)
+
+    @staticmethod
+    def build_index(clean_data):
+        # cumulative busy and queue areas up to each clock, so that any
+        # interval can be integrated without walking the records
+        area_b = array('d', [0.0])
+        area_q = array('d', [0.0])
+        clocks = clean_data['clock']
+        counts = clean_data['count']
+        queues = clean_data['queue']
+        for k in range(1, len(clocks)):
+            delta_t = clocks[k] - clocks[k-1]
+            area_b.append(area_b[-1] + counts[k-1] * delta_t)
+            area_q.append(area_q[-1] + queues[k-1] * delta_t)
+        clean_data['area_b'] = area_b
+        clean_data['area_q'] = area_q
         return clean_data
 
     @staticmethod
     def seek(data, start, mark):
-        n = len(data)
-        index = start
-        while index < n and data[index]['clock'] < mark:
-            index += 1
-        if index >= n:
-            # beyond scope, use last
-            index = n - 1
-        else:
-            if data[index]['clock'] > mark and index > 0:
-                # use previous record
-                index -= 1
-
+        # last record at or before mark, beyond scope uses the last one
+        index = bisect_right(data['clock'], mark, start) - 1
+        if index < 0:
+            index = 0
         return index
 
-    def get_stats(self, name, begin, end):
+    def _clean_stats(self, name):
+        if 'logs' not in self._resources[name] and 'stats' not in self._resources[name]:
+            raise ValueError('{} is monitored in stream mode, use get_summary or get_windows'.format(name))
+        if self._resources[name].get('drained'):
+            raise ValueError('{} logs were exported to disk, use results_export.load_monitor'.format(name))
+        r = self._resources[name]
+        if 'logs' in r and len(r['logs']['clock']):
+            # the cleaned stats are rebuilt when the run went on since
+            logs = r['logs']
+            key = (len(logs['clock']), logs['clock'][-1], logs['count'][-1], logs['queue'][-1])
+            if r.get('stats_key') != key:
+                r.pop('stats', None)
+                r['stats_key'] = key
         if 'stats' not in self._resources[name]:
-            self._resources[name]['stats'] = self.cleanup(self._resources[name]['logs'])
+            logs = self._resources[name]['logs']
+            if self._resources[name].get('changes'):
+                clean_data = { 'clock': array('d', logs['clock']), 'count': array('i', logs['count']),
+                               'queue': array('i', logs['queue']) }
+                self._resources[name]['stats'] = self.build_index(clean_data)
+            elif not len(logs['clock']):
+                # no request or release yet, so the state is the one at registration
+                r = self._resources[name]
+                resource = r.get('resource')
+                clean_data = { 'clock': array('d', [r['begin']]),
+                               'count': array('i', [resource.count if resource is not None else 0]),
+                               'queue': array('i', [len(resource.queue) if resource is not None else 0]) }
+                r['stats'] = self.build_index(clean_data)
+            else:
+                self._resources[name]['stats'] = self.cleanup(logs)
+        return self._resources[name]['stats']
 
+    def get_stats(self, name, begin, end):
+        if end <= begin:
+            # nothing to average over an empty interval, e.g. a resource
+            # closed before the clock has moved
+            return { 'begin': begin, 'end': end, 'stats': { 'util': 0.0, 'queue': 0.0 }}
+        log = self._clean_stats(name)
         capacity = self._resources[name]['capacity']
-        log = self._resources[name]['stats']
         # seek the begin
         b_index = Monitor.seek(log, 0, begin)
         e_index = Monitor.seek(log, b_index, end)
 
-        total_b = 0
-        total_q = 0
-        cur_t = begin
-        cur_b = log[b_index]['stats']['count']
-        cur_q = log[b_index]['stats']['queue']
-        k = b_index + 1
-        while k <= e_index:
-            delta_t = log[k]['clock'] - cur_t
-            total_b += cur_b * delta_t
-            total_q += cur_q * delta_t
-            cur_t = log[k]['clock']
-            cur_b = log[k]['stats']['count']
-            cur_q = log[k]['stats']['queue']
-            k += 1
-        # have to handle e_index
-        delta_t = end - cur_t
-        total_b += cur_b * delta_t
-        total_q += cur_q * delta_t
+        clocks = log['clock']
+        counts = log['count']
+        queues = log['queue']
+        # area between the records from the index, corrected for the partial
+        # segments at both ends of the interval
+        total_b = log['area_b'][e_index] - log['area_b'][b_index] \
+            - counts[b_index] * (begin - clocks[b_index]) + counts[e_index] * (end - clocks[e_index])
+        total_q = log['area_q'][e_index] - log['area_q'][b_index] \
+            - queues[b_index] * (begin - clocks[b_index]) + queues[e_index] * (end - clocks[e_index])
 
         total_b /= 1.0*(end-begin)*capacity
         total_q /= 1.0*(end-begin)
@@ -142,6 +440,63 @@ class Monitor:
         r = { 'begin': begin, 'end': end, 'stats': { 'util': total_b, 'queue': total_q }}
         return r
 
+    def get_stats_many(self, name, begins, ends):
+        """Same as get_stats but for many [begin, end) windows at once.
+        *begins* and *ends* are array-like, and the stats are NumPy arrays.
+        """
+        log = self._clean_stats(name)
+        capacity = self._resources[name]['capacity']
+        begins = np.asarray(begins, dtype=float)
+        ends = np.asarray(ends, dtype=float)
+        clocks = np.frombuffer(log['clock'], dtype=float)
+        counts = np.frombuffer(log['count'], dtype=np.intc)
+        queues = np.frombuffer(log['queue'], dtype=np.intc)
+        area_b = np.frombuffer(log['area_b'], dtype=float)
+        area_q = np.frombuffer(log['area_q'], dtype=float)
+
+        b_index = np.maximum(np.searchsorted(clocks, begins, side='right') - 1, 0)
+        e_index = np.maximum(np.searchsorted(clocks, ends, side='right') - 1, 0)
+        total_b = area_b[e_index] - area_b[b_index] \
+            - counts[b_index] * (begins - clocks[b_index]) + counts[e_index] * (ends - clocks[e_index])
+        total_q = area_q[e_index] - area_q[b_index] \
+            - queues[b_index] * (begins - clocks[b_index]) + queues[e_index] * (ends - clocks[e_index])
+
+        # empty windows give 0, as in get_stats
+        lengths = np.where(ends > begins, ends - begins, np.inf)
+        total_b /= lengths*capacity
+        total_q /= lengths
+
+        r = { 'begin': begins, 'end': ends, 'stats': { 'util': total_b, 'queue': total_q }}
+        return r
+
+    def get_summary(self, name):
+        """Utilization and mean queue length from registration until now."""
+        r = self._resources[name]
+        if r.get('closed') or 'resource' not in r:
+            return r['summary']
+        now = r['resource']._env.now
+        if 'stream' not in r:
+            return self.get_stats(name, r['begin'], now)
+
+        data = r['stream']
+        Monitor.advance(data, now, r['resource'].count, len(r['resource'].queue))
+        duration = now - data['begin']
+        if duration > 0:
+            stats = { 'util': data['area_b'] / (duration * data['capacity']), 'queue': data['area_q'] / duration }
+        else:
+            stats = { 'util': 0.0, 'queue': 0.0 }
+        return { 'begin': data['begin'], 'end': now, 'stats': stats }
+
+    def get_windows(self, name):
+        """Completed window aggregates of a resource in stream mode, oldest first."""
+        r = self._resources[name]
+        if r.get('closed') or 'resource' not in r:
+            return r['windows']
+        resource = r['resource']
+        data = r['stream']
+        Monitor.advance(data, resource._env.now, resource.count, len(resource.queue))
+        return list(data['windows'])
+
 
 if __name__ == "__main__":
     def test_process(env, name, resource):
@@ -181,3 +536,26 @@ if __name__ == "__main__":
     test_stats(m, 7, 25)
     test_stats(m, 10, 20)
     test_stats(m, 10, 25)
+    print(m.get_summary('test'))
+    print(m.get_stats_many('test', [0, 1, 7, 10, 7], [10, 9, 25, 20, 9]))
+
+    # the same run in stream mode, with 5-unit windows
+    env = simpy.Environment()
+    resource = simpy.Resource(env, capacity=capacity)
+    m = Monitor()
+    m.register('test', resource, capacity, stream=True, window=5)
+    proc = env.process(test_process(env, 'P0', resource))
+    proc = start_delayed(env, test_process(env, 'P1', resource), 5)
+    proc = start_delayed(env, test_process(env, 'P2', resource), 10)
+    env.run(until=25)
+    print(m.get_summary('test'))
+    print(m.get_windows('test'))
+
+    # a second run under the same name keeps the first one in the history
+    env = simpy.Environment()
+    resource = simpy.Resource(env, capacity=capacity)
+    m.register('test', resource, capacity, stream=True)
+    proc = env.process(test_process(env, 'P0', resource))
+    env.run(until=25)
+    print(m.get_summary('test'))
+    print([h['summary'] for h in m.get_history('test')])
@@ -0,0 +1,154 @@
+#!/usr/bin/env python
+#
+# Simpy Example - On-disk cache of model results
+# for 2110636 Performance Evaluation and Analysis Class
+# Natawut Nupairoj, Chulalongkorn University, Thailand
+import hashlib
+import inspect
+import json
+import os
+import pickle
+import random
+from functools import partial
+
+
+def source_of(func):
+    """Text that changes whenever *func* changes: its source, or its byte
+    code when the source is not available.
+    """
+    if func is None:
+        return ''
+    if isinstance(func, partial):
+        return source_of(func.func) + repr((func.args, sorted(func.keywords.items())))
+    try:
+        return inspect.getsource(func)
+    except (OSError, TypeError):
+        if inspect.isclass(func):
+            return ''.join(source_of(f) for f in vars(func).values() if inspect.isfunction(f))
+        code = getattr(func, '__code__', None)
+        return code.co_code.hex() if code else repr(func)
+
+
+def fingerprint(params, seed, *funcs):
+    """Hash of the parameters, the seed and the source of *funcs*."""
+    h = hashlib.sha256()
+    h.update(json.dumps({ 'params': params, 'seed': seed }, sort_keys=True, default=repr).encode('utf-8'))
+    for func in funcs:
+        h.update(source_of(func).encode('utf-8'))
+    return h.hexdigest()
+
+
+class ResultCache(object):
+    """Results of model runs, one pickle per run under *path*.  Reading a
+    result marks it as recently used; when the directory grows past
+    *max_bytes* the least recently used results are removed.  The
+    directory is scanned once here and again only to evict, in between the
+    bytes written are added to a running total.
+    """
+    def __init__(self, path='.result-cache', max_bytes=1<<30):
+        self.path = path
+        self.max_bytes = max_bytes
+        os.makedirs(path, exist_ok=True)
+        self.total = self.size()
+
+    def file_of(self, key):
+        return os.path.join(self.path, key + '.pickle')
+
+    def get(self, key, default=None):
+        path = self.file_of(key)
+        try:
+            with open(path, 'rb') as f:
+                value = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return default
+        try:
+            os.utime(path)
+        except OSError:
+            # evicted by another process since it was read
+            pass
+        return value
+
+    def put(self, key, value):
+        path = self.file_of(key)
+        # write then rename so a reader never sees half a file
+        with open(path + '.tmp', 'wb') as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            self.total += f.tell()
+        try:
+            # a result written again replaces the old file
+            self.total -= os.stat(path).st_size
+        except OSError:
+            pass
+        os.replace(path + '.tmp', path)
+        if self.total > self.max_bytes:
+            self.evict()
+
+    def entries(self):
+        # (last used, size, path) of every result, oldest first
+        files = []
+        for entry in os.scandir(self.path):
+            if entry.name.endswith('.pickle'):
+                s = entry.stat()
+                files.append((s.st_mtime, s.st_size, entry.path))
+        return sorted(files)
+
+    def size(self):
+        return sum(size for t, size, path in self.entries())
+
+    def evict(self):
+        # the scan also picks up what other processes wrote
+        files = self.entries()
+        total = sum(size for t, size, path in files)
+        for t, size, path in files:
+            if total <= self.max_bytes:
+                break
+            os.remove(path)
+            total -= size
+        self.total = total
+
+    def clear(self):
+        for t, size, path in self.entries():
+            os.remove(path)
+        self.total = 0
+
+    def call(self, model, seed=0, params=None, summarize=None, keep_monitor=False, depends=()):
+        """model(seed), or its summary, from the cache if this model,
+        *params*, seed and *summarize* were run before.  *params* only
+        identifies the run: pass whatever the model reads besides the seed
+        (module constants, or the dict given to a partial), and list in
+        *depends* the functions, classes or modules it uses whose changes
+        should also invalidate the result.  With keep_monitor=True the full result
+        is kept next to the summary and (summary, result) is returned.
+        """
+        key = fingerprint(params, seed, model, summarize, *depends) + ('-full' if keep_monitor else '')
+        value = self.get(key)
+        if value is None:
+            random.seed(seed)
+            result = model(seed)
+            summary = summarize(result) if summarize is not None else result
+            value = (summary, result) if keep_monitor else summary
+            self.put(key, value)
+        return value
+
+
+if __name__ == "__main__":
+    import shutil
+    import time
+    from models import ticket_office
+    from replication import summarize_monitor
+
+    params = { 'MEAN_INTER_ARRIVAL_TIME': 10, 'MEAN_SERVICE_TIME': 8, 'SIMULATION_END_TIME': 50000 }
+    model = partial(ticket_office.run, params)
+    cache = ResultCache('demo-cache', max_bytes=1<<20)
+    for rerun in range(2):
+        t = time.perf_counter()
+        summaries = [cache.call(model, seed, params, summarize_monitor, depends=(ticket_office,))
+                     for seed in [123, 456, 789]]
+        print('took {:.3f}s'.format(time.perf_counter() - t), summaries[0]['office'])
+    # the Monitor read back from the cache answers like the one of the run
+    summary, monitor = cache.call(model, 123, params, summarize_monitor, keep_monitor=True)
+    summary, cached = cache.call(model, 123, params, summarize_monitor, keep_monitor=True)
+    assert cached is not monitor and summarize_monitor(cached) == summarize_monitor(monitor)
+    print('kept monitor', cached.get_summary('office')['stats'], cached.get_stats('office', 0, 1000)['stats'])
+    print('cache size', cache.size(), 'bytes in', len(cache.entries()), 'files')
+    shutil.rmtree('demo-cache')
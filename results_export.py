@@ -0,0 +1,224 @@
+#!/usr/bin/env python
+#
+# Simpy Example - Streaming export of Monitor results to .npy columns
+# for 2110636 Performance Evaluation and Analysis Class
+# Natawut Nupairoj, Chulalongkorn University, Thailand
+import json
+import os
+import numpy as np
+from resource_monitor import Monitor, MonitoredResource
+from entity_stats import EntityStats
+
+NPY_HEADER_SIZE = 128
+
+
+class NpyAppender(object):
+    """A 1-D .npy file that grows by appending.  The header is written with
+    a fixed size and rewritten with the final shape on close, so the result
+    is a plain .npy file that np.load(..., mmap_mode='r') can map.
+    """
+    def __init__(self, path, dtype):
+        self.path = path
+        self.dtype = np.dtype(dtype)
+        self.size = 0
+        self.file = open(path, 'wb')
+        self._write_header()
+
+    def _write_header(self):
+        header = "{{'descr': '{}', 'fortran_order': False, 'shape': ({},), }}".format(self.dtype.str, self.size)
+        header = header.ljust(NPY_HEADER_SIZE - 10 - 1) + '\n'
+        self.file.write(b'\x93NUMPY\x01\x00' + np.uint16(len(header)).astype('<u2').tobytes() + header.encode('latin1'))
+
+    def append(self, values):
+        values = np.asarray(values, dtype=self.dtype)
+        self.file.write(values.tobytes())
+        self.size += values.size
+
+    def close(self):
+        self.file.seek(0)
+        self._write_header()
+        self.file.close()
+
+
+class RunExporter(object):
+    """Write the resource logs and entity samples of a Monitor to *path*
+    while the simulation runs.  Every flush appends the new records to one
+    .npy file per column and, with *drain*, removes them from memory, so a
+    run can be larger than RAM.  Pass *interval* to flush periodically from
+    a SimPy process.  Once drained, the results are read back with
+    load_run or load_monitor.
+    """
+    def __init__(self, path, monitor, env, interval=None, drain=True):
+        self.path = path
+        self.monitor = monitor
+        self.env = env
+        self.drain = drain
+        self._files = {}
+        self._written = {}
+        os.makedirs(path, exist_ok=True)
+        if interval is not None:
+            env.process(self.flusher(interval))
+
+    def flusher(self, interval):
+        while True:
+            yield self.env.timeout(interval)
+            self.flush()
+
+    def _column(self, name, dtype):
+        if name not in self._files:
+            self._files[name] = NpyAppender(os.path.join(self.path, name + '.npy'), dtype)
+        return self._files[name]
+
+    def _append(self, column, values, end=None):
+        # write values[written:end] and, with drain, drop them from memory
+        data = np.frombuffer(values, dtype=values.typecode)
+        if end is None:
+            end = data.size
+        start = self._written.get(column, 0)
+        if end > start:
+            self._column(column, data.dtype).append(data[start:end])
+        # the view must go before the array can shrink
+        del data
+        if self.drain:
+            del values[:end]
+            end = 0
+        self._written[column] = end
+
+    def flush(self, final=False):
+        for name in self.monitor.get_names():
+            r = self.monitor.get_resource(name)
+            if 'logs' in r:
+                logs = r['logs']
+                n = len(logs['clock'])
+                if r.get('changes') and not final:
+                    # the last record may still be replaced at the same clock
+                    n -= 1
+                if n > 0:
+                    for key, values in logs.items():
+                        self._append('{}.{}'.format(name, key), values, n)
+                    if self.drain:
+                        r['drained'] = True
+            entity = r['entity']
+            for key in entity.get_metrics():
+                self._append('{}.entity.{}'.format(name, key), entity._samples[key])
+
+    def close(self):
+        # nothing can replace the last records any more
+        self.flush(final=True)
+        for f in self._files.values():
+            f.close()
+
+        meta = {}
+        for name in self.monitor.get_names():
+            r = self.monitor.get_resource(name)
+            m = { 'capacity': r['capacity'], 'begin': r['begin'], 'end': self.env.now,
+                  'changes': bool(r.get('changes')), 'entity': r['entity'].summary() }
+            if 'logs' in r:
+                m['columns'] = [key for key in r['logs']]
+            else:
+                m['summary'] = self.monitor.get_summary(name)
+                m['windows'] = self.monitor.get_windows(name)
+            meta[name] = m
+        with open(os.path.join(self.path, 'meta.json'), 'w') as f:
+            json.dump(meta, f)
+
+
+def clean_columns(clock, count, queue):
+    """Vectorized Monitor.cleanup: the stats of a clock come from the first
+    record of the next clock, the last clock keeps the last record.
+    """
+    first = np.flatnonzero(np.diff(clock) > 0) + 1
+    clean_clock = np.concatenate((clock[:1], clock[first[:-1]], clock[-1:])) if first.size else clock[-1:]
+    last = np.array([clock.size - 1])
+    return clean_clock, np.concatenate((count[first], count[last])), np.concatenate((queue[first], queue[last]))
+
+
+def build_index(clock, count, queue):
+    # NumPy version of Monitor.build_index for memory-mapped columns
+    delta_t = np.diff(clock)
+    area_b = np.concatenate(([0.0], np.cumsum(count[:-1] * delta_t)))
+    area_q = np.concatenate(([0.0], np.cumsum(queue[:-1] * delta_t)))
+    return { 'clock': clock, 'count': count, 'queue': queue, 'area_b': area_b, 'area_q': area_q }
+
+
+def load_run(path):
+    """Memory-map an exported run.  Returns, for every resource, its meta
+    data, the cleaned stats with their prefix-sum index and the entity
+    samples of every metric.
+    """
+    with open(os.path.join(path, 'meta.json')) as f:
+        meta = json.load(f)
+    run = {}
+    for name, m in meta.items():
+        r = dict(m)
+        if 'columns' in m:
+            columns = dict((key, np.load(os.path.join(path, '{}.{}.npy'.format(name, key)), mmap_mode='r'))
+                           for key in m['columns'])
+            if m['changes']:
+                r['stats'] = build_index(columns['clock'], columns['count'], columns['queue'])
+            else:
+                r['stats'] = build_index(*clean_columns(columns['clock'], columns['count'], columns['queue']))
+        r['samples'] = {}
+        for key in m['entity']:
+            f = os.path.join(path, '{}.entity.{}.npy'.format(name, key))
+            if os.path.exists(f):
+                r['samples'][key] = np.load(f, mmap_mode='r')
+        run[name] = r
+    return run
+
+
+def load_monitor(path):
+    """A closed Monitor over an exported run, so get_stats, get_stats_many
+    and get_summary work on the memory-mapped data.  Entity samples are in
+    load_run; the Monitor only has empty entity stores.
+    """
+    monitor = Monitor()
+    for name, r in load_run(path).items():
+        e = { 'name': name, 'capacity': r['capacity'], 'begin': r['begin'], 'end': r['end'],
+              'entity': EntityStats() }
+        if 'stats' in r:
+            e['stats'] = r['stats']
+            monitor.attach(name, e)
+            e['summary'] = monitor.get_stats(name, r['begin'], r['end'])
+        else:
+            e['summary'] = r['summary']
+            e['windows'] = r['windows']
+            monitor.attach(name, e)
+    return monitor
+
+
+if __name__ == "__main__":
+    import random
+    import shutil
+    import tempfile
+    import simpy
+
+    def passenger(env, resource, monitor):
+        t_arrive = env.now
+        with resource.request() as request:
+            yield request
+            t_queue = env.now - t_arrive
+            yield env.timeout(random.expovariate(1/8))
+        monitor.entity_logger('office', None, { 't_queue': t_queue, 't_response': env.now - t_arrive })
+
+    def passenger_generator(env, resource, monitor):
+        while True:
+            env.process(passenger(env, resource, monitor))
+            yield env.timeout(random.expovariate(1/10))
+
+    export_dir = os.path.join(tempfile.mkdtemp(), 'export-demo')
+    for cls in (simpy.Resource, MonitoredResource):
+        random.seed(1234)
+        env = simpy.Environment()
+        office = cls(env, capacity=1)
+        m = Monitor()
+        m.register('office', office, 1)
+        exporter = RunExporter(export_dir, m, env, interval=1000)
+        env.process(passenger_generator(env, office, m))
+        env.run(until=20000)
+        exporter.close()
+
+        loaded = load_monitor(export_dir)
+        run = load_run(export_dir)
+        print(cls.__name__, loaded.get_summary('office'), run['office']['samples']['t_response'].mean())
+    shutil.rmtree(os.path.dirname(export_dir))
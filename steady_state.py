@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+#
+# Simpy Example - Steady-state estimation from one long run (batch means)
+# for 2110636 Performance Evaluation and Analysis Class
+# Natawut Nupairoj, Chulalongkorn University, Thailand
+import numpy as np
+import scipy.stats as st
+
+
+def mser(data, batch=5):
+    """MSER-m warm-up detection (MSER-5 by default).  The series is averaged
+    into batches of *batch* points and the truncation that minimizes the
+    standard error of the remaining mean is chosen among the first half of
+    the batches.  Returns the number of raw points to drop.
+    """
+    data = np.asarray(data, dtype=float)
+    n = data.size // batch
+    if n < 2:
+        return 0
+    y = data[:n*batch].reshape(n, batch).mean(axis=1)
+    # suffix sums give the mean and the squared error of y[d:] for every d
+    s1 = np.cumsum(y[::-1])[::-1]
+    s2 = np.cumsum((y*y)[::-1])[::-1]
+    m = np.arange(n, 0, -1, dtype=float)
+    sse = s2 - s1*s1/m
+    values = sse / (m*m)
+    d = int(np.argmin(values[:n//2 + 1]))
+    return d * batch
+
+
+def lag1(data):
+    # lag-1 autocorrelation
+    data = np.asarray(data, dtype=float)
+    x = data - data.mean()
+    denom = np.dot(x, x)
+    if denom == 0:
+        return 0.0
+    return float(np.dot(x[:-1], x[1:]) / denom)
+
+
+def choose_batch_size(data, max_lag1=0.1, min_batches=10):
+    """Smallest batch size, doubling from 1, for which the lag-1
+    autocorrelation of the batch means is below *max_lag1*, while keeping
+    at least *min_batches* batches.
+    """
+    data = np.asarray(data, dtype=float)
+    size = 1
+    while data.size // (size*2) >= min_batches:
+        n = data.size // size
+        means = data[:n*size].reshape(n, size).mean(axis=1)
+        if abs(lag1(means)) < max_lag1:
+            break
+        size *= 2
+    return size
+
+
+def batch_means(data, alpha=0.95, warmup=None, batch_size=None, max_lag1=0.1, min_batches=10):
+    """Steady-state mean of a series with a batch-means confidence interval.
+    The warm-up is detected with MSER-5 unless *warmup* is given, and the
+    batch size comes from choose_batch_size unless *batch_size* is given.
+    """
+    data = np.asarray(data, dtype=float)
+    if warmup is None:
+        warmup = mser(data)
+    steady = data[warmup:]
+    if batch_size is None:
+        batch_size = choose_batch_size(steady, max_lag1, min_batches)
+    n = steady.size // batch_size
+    means = steady[-n*batch_size:].reshape(n, batch_size).mean(axis=1)
+
+    mean = float(means.mean())
+    sem = st.sem(means) if n > 1 else 0
+    if sem != 0:
+        (low, high) = st.t.interval(alpha, n-1, loc=mean, scale=sem)
+    else:
+        (low, high) = (mean, mean)
+    r = { 'mean': mean, 'low': float(low), 'high': float(high), 'warmup': warmup,
+          'batch_size': batch_size, 'n_batches': n, 'lag1': lag1(means) }
+    return r
+
+
+def monitor_series(monitor, name, step, metric='queue', begin=0, end=None):
+    """Per-window values of *metric* ('util' or 'queue') over consecutive
+    windows of length *step*, computed from the Monitor in one call.
+    """
+    if end is None:
+        end = monitor.get_summary(name)['end']
+    begins = np.arange(begin, end - step + 1e-9, step)
+    stats = monitor.get_stats_many(name, begins, begins + step)
+    return begins, stats['stats'][metric]
+
+
+def steady_state(monitor, name, step, metric='queue', alpha=0.95):
+    """Batch-means estimate of *metric* for a resource, based on windows of
+    length *step*.  The warm-up is reported in time units.
+    """
+    clocks, values = monitor_series(monitor, name, step, metric)
+    r = batch_means(values, alpha)
+    r['warmup_time'] = r['warmup'] * step
+    return r
+
+
+if __name__ == "__main__":
+    # AR(1) series with a decaying start-up bias, true mean 5
+    rng = np.random.default_rng(1234)
+    n = 1000000
+    noise = rng.normal(0, 1, n)
+    x = np.empty(n)
+    x[0] = 0
+    for i in range(1, n):
+        x[i] = 0.9 * x[i-1] + noise[i]
+    x += 5 + 20 * np.exp(-np.arange(n) / 2000.0)
+    print(batch_means(x))
@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+#
+# Simpy Example - Parameter sweeps over (parameters x seeds)
+# for 2110636 Performance Evaluation and Analysis Class
+# Natawut Nupairoj, Chulalongkorn University, Thailand
+import itertools
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import partial
+import numpy as np
+from replication import replicate, summarize_monitor
+from result_cache import ResultCache, fingerprint
+
+
+def grid(params):
+    """Every combination of a dict of {name: list of values}."""
+    names = list(params)
+    return [dict(zip(names, values)) for values in itertools.product(*(params[n] for n in names))]
+
+
+def latin_hypercube(bounds, n, seed=None):
+    """*n* points of a Latin hypercube design over {name: (low, high)}.
+    Each range is cut into n strata and every stratum is used once.  A
+    range given with two ints gives int values (e.g. a capacity).
+    """
+    rng = np.random.default_rng(seed)
+    points = [{} for i in range(n)]
+    for name, (low, high) in bounds.items():
+        u = (rng.permutation(n) + rng.random(n)) / n
+        if isinstance(low, int) and isinstance(high, int):
+            values = np.floor(low + u * (high - low + 1)).astype(int).tolist()
+        else:
+            values = (low + u * (high - low)).tolist()
+        for p, v in zip(points, values):
+            p[name] = v
+    return points
+
+
+def run_sweep(model, points, seeds, cache=None, summarize=summarize_monitor, workers=None, depends=()):
+    """Run model(params, seed) for every point and seed on a process pool.
+    *cache* is a ResultCache or a directory for one: each finished job is
+    stored as soon as it completes, keyed by its parameters, seed and the
+    source of *model*, *summarize* and *depends* (see ResultCache.call),
+    and jobs already there are not run again.  Returns a list of {'params', 'seed', 'summary'} in (point,
+    seed) order.
+    """
+    if isinstance(cache, str):
+        cache = ResultCache(cache)
+    jobs = [(params, seed) for params in points for seed in seeds]
+    results = [None] * len(jobs)
+    todo = []
+    for i, (params, seed) in enumerate(jobs):
+        key = fingerprint(params, seed, model, summarize, *depends) if cache else None
+        summary = cache.get(key) if cache else None
+        if summary is not None:
+            results[i] = { 'params': params, 'seed': seed, 'summary': summary }
+        else:
+            todo.append((i, key))
+
+    def done(i, key, summary):
+        params, seed = jobs[i]
+        results[i] = { 'params': params, 'seed': seed, 'summary': summary }
+        if cache:
+            cache.put(key, summary)
+
+    if workers == 1:
+        for i, key in todo:
+            params, seed = jobs[i]
+            done(i, key, replicate(partial(model, params), summarize, seed))
+    elif todo:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {}
+            for i, key in todo:
+                params, seed = jobs[i]
+                futures[executor.submit(replicate, partial(model, params), summarize, seed)] = (i, key)
+            for future in as_completed(futures):
+                i, key = futures[future]
+                done(i, key, future.result())
+    return results
+
+
+if __name__ == "__main__":
+    import shutil
+    import time
+    from analytic import mmc
+    from models import ticket_office
+
+    points = grid({ 'MEAN_INTER_ARRIVAL_TIME': [4, 5, 10], 'MEAN_SERVICE_TIME': [8], 'capacity': [2, 3] })
+    for rerun in range(2):
+        t = time.perf_counter()
+        results = run_sweep(ticket_office.run, points, [1, 2, 3], cache='sweep-cache', depends=(ticket_office,))
+        print('sweep took {:.2f}s'.format(time.perf_counter() - t))
+    for r in results[::3]:
+        p = r['params']
+        theory = mmc(1/p['MEAN_INTER_ARRIVAL_TIME'], 1/p['MEAN_SERVICE_TIME'], p['capacity'])
+        print(p, r['summary']['office']['queue'], theory['Lq'])
+    print(latin_hypercube({ 'MEAN_INTER_ARRIVAL_TIME': (4.0, 10.0), 'capacity': (1, 4) }, 5, seed=1))
+    shutil.rmtree('sweep-cache')
@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+#
+# Simpy Example - Levelled, buffered event tracer
+# for 2110636 Performance Evaluation and Analysis Class
+# Natawut Nupairoj, Chulalongkorn University, Thailand
+import json
+import struct
+import numpy as np
+
+DEBUG = 10
+INFO = 20
+WARNING = 30
+
+# clock, level, event code, entity id, value
+RECORD = struct.Struct('<dBHId')
+RECORD_DTYPE = np.dtype([('clock', '<f8'), ('level', 'u1'), ('event', '<u2'), ('entity', '<u4'), ('value', '<f8')])
+
+
+class Tracer(object):
+    """Replacement for print() in entity processes.  Records are packed into
+    a binary buffer and written to *path* in bulk.  Processes ask for a
+    logger once and guard each call with `if trace:`, so a disabled tracer
+    costs a single test:
+
+        trace = tracer.logger(INFO)
+        ...
+        if trace:
+            trace(env.now, pid, ARRIVE)
+    """
+    def __init__(self, path=None, level=INFO, enabled=True, buffer_size=1 << 20):
+        self.path = path
+        self.level = level
+        self.enabled = enabled and path is not None
+        self.buffer_size = buffer_size
+        self.buffer = bytearray()
+        self.events = []
+        if self.enabled:
+            # start a new trace file
+            open(path, 'wb').close()
+
+    def event(self, name):
+        """Register an event name and return its code."""
+        self.events.append(name)
+        return len(self.events) - 1
+
+    def logger(self, level):
+        """A function (clock, entity, event, value=0.0) that records at
+        *level*, or None when the tracer is disabled for that level.
+        """
+        if not self.enabled or level < self.level:
+            return None
+        pack = RECORD.pack
+        buffer = self.buffer
+
+        def trace(clock, entity, event, value=0.0):
+            buffer.extend(pack(clock, level, event, entity, value))
+            if len(buffer) >= self.buffer_size:
+                self.flush()
+
+        return trace
+
+    def flush(self):
+        if self.enabled and self.buffer:
+            with open(self.path, 'ab') as f:
+                f.write(self.buffer)
+            del self.buffer[:]
+
+    def close(self):
+        # the event names go next to the records
+        self.flush()
+        if self.enabled:
+            with open(self.path + '.events.json', 'w') as f:
+                json.dump(self.events, f)
+
+
+def read_trace(path):
+    """Load a trace as a NumPy structured array plus its event names."""
+    with open(path + '.events.json') as f:
+        events = json.load(f)
+    return np.fromfile(path, dtype=RECORD_DTYPE), events
+
+
+def format_trace(path, entity_format='Entity#{}'):
+    # text lines in the same layout as the print() logging
+    records, events = read_trace(path)
+    for r in records:
+        name = entity_format.format(r['entity'])
+        line = '[{:6.2f}:{}] - {}'.format(r['clock'], name, events[r['event']])
+        if r['value'] != 0:
+            line += ' ({:4.2f})'.format(r['value'])
+        yield line
+
+
+if __name__ == "__main__":
+    import os
+    import shutil
+    import tempfile
+
+    trace_dir = tempfile.mkdtemp()
+    trace_path = os.path.join(trace_dir, 'tracer-demo.trace')
+    tracer = Tracer(trace_path, level=INFO)
+    ARRIVE = tracer.event('arrive')
+    DEPART = tracer.event('depart')
+    trace = tracer.logger(INFO)
+    debug = tracer.logger(DEBUG)
+    for i in range(5):
+        if trace:
+            trace(i * 1.5, i, ARRIVE)
+        if debug:
+            debug(i * 1.5, i, DEPART)
+    tracer.close()
+    for line in format_trace(trace_path, 'Passenger#{}'):
+        print(line)
+    shutil.rmtree(trace_dir)
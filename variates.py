@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+#
+# Simpy Example - Pre-generated random variate streams
+# for 2110636 Performance Evaluation and Analysis Class
+# Natawut Nupairoj, Chulalongkorn University, Thailand
+import zlib
+import numpy as np
+
+
+class VariateStream(object):
+    """Random stream with its own seed that draws variates from NumPy in
+    blocks of *block_size* and hands them out one at a time.  It has the
+    same method names as the random module (expovariate, random, uniform,
+    gauss), so it can be passed wherever random is used.
+
+    Exponential variates are made by inversion of the uniforms, so an
+    *antithetic* stream with the same seed gives the mirrored values
+    (1-u instead of u, -z instead of z).
+    """
+    def __init__(self, seed=None, block_size=4096, antithetic=False):
+        self.seed = seed
+        self.block_size = block_size
+        self.antithetic = antithetic
+        self.rng = np.random.default_rng(seed)
+        self._exponential = iter(())
+        self._uniform = iter(())
+        self._normal = iter(())
+
+    def _uniforms(self, size):
+        block = self.rng.random(size)
+        if self.antithetic:
+            block = 1.0 - block
+        return block
+
+    def _block(self, dist):
+        if dist == 'normal':
+            block = self.rng.standard_normal(self.block_size)
+            if self.antithetic:
+                block = -block
+        else:
+            block = self._uniforms(self.block_size)
+            if dist == 'exponential':
+                block = -np.log1p(-block)
+        # plain floats are faster to hand out one by one than NumPy scalars
+        return iter(block.tolist())
+
+    def expovariate(self, lambd):
+        try:
+            return next(self._exponential) / lambd
+        except StopIteration:
+            self._exponential = self._block('exponential')
+            return next(self._exponential) / lambd
+
+    def random(self):
+        try:
+            return next(self._uniform)
+        except StopIteration:
+            self._uniform = self._block('uniform')
+            return next(self._uniform)
+
+    def uniform(self, a, b):
+        return a + (b - a) * self.random()
+
+    def gauss(self, mu, sigma):
+        try:
+            return mu + sigma * next(self._normal)
+        except StopIteration:
+            self._normal = self._block('normal')
+            return mu + sigma * next(self._normal)
+
+    normalvariate = gauss
+
+    def exponential_block(self, scale, size):
+        """A whole array of exponential variates with mean *scale*, for code
+        that can work on arrays directly.  Made by inversion like
+        expovariate, so they are mirrored in an antithetic stream.
+        """
+        return -scale * np.log1p(-self._uniforms(size))
+
+
+class StreamSet(object):
+    """One VariateStream per purpose ('arrival', 'service-office',
+    'routing', ...), all derived from a single *seed*.  A purpose always
+    gets the same stream for the same seed, whatever other streams exist or
+    the order they are asked for, so two scenarios built from the same seed
+    share common random numbers.
+    """
+    def __init__(self, seed, antithetic=False, block_size=4096):
+        self.seed = seed
+        self.antithetic = antithetic
+        self.block_size = block_size
+        self._streams = {}
+
+    def get(self, purpose):
+        if purpose not in self._streams:
+            key = zlib.crc32(purpose.encode('utf-8'))
+            seq = np.random.SeedSequence(self.seed, spawn_key=(key,))
+            self._streams[purpose] = VariateStream(seq, self.block_size, self.antithetic)
+        return self._streams[purpose]
+
+    __getitem__ = get
+
+
+if __name__ == "__main__":
+    import random
+    import timeit
+
+    stream = VariateStream(1234)
+    n = 1000000
+    print('random.expovariate', timeit.timeit(lambda: random.expovariate(0.1), number=n))
+    print('VariateStream.expovariate', timeit.timeit(lambda: stream.expovariate(0.1), number=n))
+    print('mean', sum(stream.expovariate(0.1) for i in range(n)) / n)